@@ -0,0 +1,351 @@
+# tox -e bench runs benchmarks and saves results in .benchmarks.
+#
+# tox -e bench-compare does the same, compares results with the previous run,
+# and fails if any benchmark regressed by more than 10%.
+
+import concurrent.futures
+import json
+import operator
+import pickle
+from datetime import date as d
+from datetime import datetime as dt
+from datetime import timedelta as td
+
+import pytest
+from datedelta import datedelta as dd
+from datedelta import (
+    BusinessCalendar,
+    MONTH,
+    YEAR,
+    Recurrence,
+    DatedeltaArray,
+    add_array,
+    between_array,
+    cached_add,
+    decode_many,
+    encode_many,
+    grid,
+    instrumentation,
+    next_occurrences,
+    parse_many,
+    periods_between,
+    periods_between_array,
+    schedule,
+    stream_shift,
+    sub_array,
+)
+
+DELTA = dd(years=2, months=3, days=6)
+
+# Start dates exercising the common path and each adjustment.
+DATES = {
+    "normal": d(2020, 5, 15),
+    "month_end": d(2020, 1, 31),
+    "leap_day": d(2020, 2, 29),
+    "datetime": dt(2020, 1, 31, 12, 30),
+}
+
+DELTAS = {
+    "year": YEAR,
+    "month": MONTH,
+    "days": dd(days=10),
+    "mixed": DELTA,
+}
+
+MANY_DATES = [d(2000, 1, 1) + td(days=n) for n in range(10_000)]
+
+MANY_ORDINALS = [date.toordinal() for date in MANY_DATES]
+
+MANY_ROWS = [[str(n), date.isoformat()] for n, date in enumerate(MANY_DATES)]
+
+MANY_DELTAS = [dd(years=n % 3, months=n % 12, days=n % 31) for n in range(10_000)]
+
+
+def test_construct(benchmark):
+    benchmark(dd, years=2, months=3, days=6)
+
+
+def test_construct_from_ints(benchmark):
+    benchmark(dd._from_ints, 2, 3, 6)
+
+
+def test_hash(benchmark):
+    benchmark(hash, DELTA)
+
+
+def test_eq(benchmark):
+    benchmark(DELTA.__eq__, dd(years=2, months=3, days=6))
+
+
+def test_dict(benchmark):
+    benchmark(dict.fromkeys, MANY_DELTAS)
+
+
+def test_set_membership(benchmark):
+    deltas = set(MANY_DELTAS)
+    benchmark(lambda: [delta in deltas for delta in MANY_DELTAS])
+
+
+def test_mul(benchmark):
+    benchmark(DELTA.__mul__, 12)
+
+
+def test_add_datedelta(benchmark):
+    benchmark(DELTA.__add__, YEAR)
+
+
+def test_neg(benchmark):
+    benchmark(DELTA.__neg__)
+
+
+@pytest.mark.parametrize("date", DATES.values(), ids=DATES.keys())
+@pytest.mark.parametrize("delta", DELTAS.values(), ids=DELTAS.keys())
+def test_radd(benchmark, date, delta):
+    benchmark(delta.__radd__, date)
+
+
+@pytest.mark.parametrize("date", DATES.values(), ids=DATES.keys())
+@pytest.mark.parametrize("delta", DELTAS.values(), ids=DELTAS.keys())
+def test_rsub(benchmark, date, delta):
+    benchmark(delta.__rsub__, date)
+
+
+def test_pickle(benchmark):
+    benchmark(lambda: pickle.loads(pickle.dumps(DELTA)))
+
+
+def test_to_bytes(benchmark):
+    benchmark(DELTA.to_bytes)
+
+
+def test_from_bytes(benchmark):
+    benchmark(dd.from_bytes, DELTA.to_bytes())
+
+
+def test_encode_many(benchmark):
+    benchmark(encode_many, MANY_DELTAS)
+
+
+def test_decode_many(benchmark):
+    benchmark(decode_many, encode_many(MANY_DELTAS))
+
+
+def test_pickle_many_dumps(benchmark):
+    benchmark(pickle.dumps, MANY_DELTAS, protocol=5)
+
+
+def test_pickle_many_loads(benchmark):
+    benchmark(pickle.loads, pickle.dumps(MANY_DELTAS, protocol=5))
+
+
+def test_json_many_dumps(benchmark):
+    benchmark(
+        lambda: json.dumps(
+            [[delta.years, delta.months, delta.days] for delta in MANY_DELTAS]
+        )
+    )
+
+
+def test_json_many_loads(benchmark):
+    data = json.dumps(
+        [[delta.years, delta.months, delta.days] for delta in MANY_DELTAS]
+    )
+    benchmark(
+        lambda: [
+            dd(years=years, months=months, days=days)
+            for years, months, days in json.loads(data)
+        ]
+    )
+
+
+def test_repr(benchmark):
+    benchmark(repr, DELTA)
+
+
+def test_str(benchmark):
+    benchmark(str, DELTA)
+
+
+def test_isoformat(benchmark):
+    benchmark(DELTA.isoformat)
+
+
+def test_fromisoformat(benchmark):
+    benchmark(dd.fromisoformat, "P2Y3M6D")
+
+
+def test_parse_many(benchmark):
+    strings = ["P1M", "P3M", "P1Y", "P2Y3M6D"] * 2_500
+    benchmark(parse_many, strings)
+
+
+def test_add_loop(benchmark):
+    benchmark(lambda: [date + DELTA for date in MANY_DATES])
+
+
+def test_apply_many(benchmark):
+    benchmark(DELTA.apply_many, MANY_DATES)
+
+
+def test_add_array(benchmark):
+    benchmark(add_array, MANY_ORDINALS, DELTA)
+
+
+def test_sub_array(benchmark):
+    benchmark(sub_array, MANY_ORDINALS, DELTA)
+
+
+def test_add_array_workers(benchmark):
+    benchmark(add_array, MANY_ORDINALS * 100, DELTA, workers=2)
+
+
+def test_add_array_datedelta_array(benchmark):
+    benchmark(add_array, MANY_ORDINALS, DatedeltaArray(MANY_DELTAS))
+
+
+def test_grid_loop(benchmark):
+    ordinals = MANY_ORDINALS[:500]
+    deltas = MANY_DELTAS[:200]
+    dates = [d.fromordinal(ordinal) for ordinal in ordinals]
+    benchmark(lambda: [[date + delta for delta in deltas] for date in dates])
+
+
+def test_grid(benchmark):
+    benchmark(grid, MANY_ORDINALS[:500], MANY_DELTAS[:200])
+
+
+def test_schedule_loop(benchmark):
+    start = DATES["month_end"]
+    benchmark(lambda: [start + n * MONTH for n in range(120)])
+
+
+def test_schedule(benchmark):
+    benchmark(lambda: list(schedule(DATES["month_end"], MONTH, 120)))
+
+
+def test_periods_between(benchmark):
+    benchmark(periods_between, DATES["month_end"], d(2030, 6, 15), MONTH)
+
+
+def test_periods_between_loop(benchmark):
+    end = d(2030, 6, 15)
+    benchmark(lambda: [periods_between(start, end, MONTH) for start in MANY_DATES])
+
+
+def test_periods_between_array(benchmark):
+    ends = [d(2030, 6, 15).toordinal()] * len(MANY_ORDINALS)
+    benchmark(periods_between_array, MANY_ORDINALS, ends, MONTH)
+
+
+def test_recurrence_next_on_or_after(benchmark):
+    recurrence = Recurrence(DATES["month_end"], MONTH)
+    benchmark(recurrence.next_on_or_after, d(2030, 6, 15))
+
+
+def test_next_occurrences(benchmark):
+    benchmark(next_occurrences, MANY_DATES, MONTH, d(2030, 6, 15))
+
+
+def test_between(benchmark):
+    benchmark(dd.between, DATES["leap_day"], d(2030, 6, 15))
+
+
+def test_between_loop(benchmark):
+    starts = MANY_DATES
+    ends = MANY_DATES[::-1]
+    benchmark(lambda: [dd.between(start, end) for start, end in zip(starts, ends)])
+
+
+def test_between_array(benchmark):
+    benchmark(between_array, MANY_ORDINALS, MANY_ORDINALS[::-1])
+
+
+@pytest.mark.parametrize("date", DATES.values(), ids=DATES.keys())
+def test_cached_add(benchmark, date):
+    benchmark(cached_add, date, DELTA)
+
+
+def test_intern(benchmark):
+    benchmark(dd.intern, years=2, months=3, days=6)
+
+
+@pytest.mark.parametrize("enabled", [False, True], ids=["disabled", "enabled"])
+def test_instrumentation(benchmark, enabled):
+    # Once disabled, instrumentation must cost nothing compared to test_radd.
+    instrumentation.enable()
+    if not enabled:
+        instrumentation.disable()
+    try:
+        benchmark(DELTA.__radd__, DATES["month_end"])
+    finally:
+        instrumentation.disable()
+
+
+def test_datedelta_array(benchmark):
+    benchmark(DatedeltaArray, MANY_DELTAS)
+
+
+def test_stream_shift(benchmark):
+    benchmark(lambda: list(stream_shift(MANY_ROWS, 1, DELTA)))
+
+
+def test_sorted(benchmark):
+    benchmark(sorted, MANY_DELTAS)
+
+
+def test_sorted_sort_key(benchmark):
+    benchmark(sorted, MANY_DELTAS, key=operator.attrgetter("sort_key"))
+
+
+def test_argsort(benchmark):
+    deltas = DatedeltaArray(MANY_DELTAS)
+    benchmark(deltas.argsort)
+
+
+CALENDAR = BusinessCalendar(d(2000, 1, 1), d(2049, 12, 31))
+
+
+def test_business_calendar(benchmark):
+    benchmark(BusinessCalendar, d(2000, 1, 1), d(2049, 12, 31))
+
+
+@pytest.mark.parametrize("date", [d(2024, 3, 1), d(2024, 3, 2)], ids=["fri", "sat"])
+def test_business_calendar_roll_forward(benchmark, date):
+    benchmark(CALENDAR.roll_forward, date)
+
+
+def test_business_calendar_add_business_days(benchmark):
+    benchmark(CALENDAR.add_business_days, d(2024, 3, 1), 10)
+
+
+def test_business_calendar_add_array(benchmark):
+    benchmark(CALENDAR.add_array, MANY_ORDINALS, DELTA)
+
+
+# Run the same amount of work in 1 to 8 threads. On free-threaded builds of
+# Python, the time should decrease with the number of threads, up to the
+# number of CPU cores.
+
+THREADS_OPERATIONS = {
+    "radd": lambda dates, ordinals, deltas: [date + DELTA for date in dates],
+    "hash": lambda dates, ordinals, deltas: [hash(delta) for delta in deltas],
+    "apply_many": lambda dates, ordinals, deltas: DELTA.apply_many(dates),
+    "add_array": lambda dates, ordinals, deltas: add_array(ordinals, DELTA),
+}
+
+
+@pytest.mark.parametrize("threads", [1, 2, 4, 8])
+@pytest.mark.parametrize(
+    "operation", THREADS_OPERATIONS.values(), ids=THREADS_OPERATIONS.keys()
+)
+def test_threads(benchmark, operation, threads):
+    chunks = [
+        (
+            MANY_DATES[thread::threads],
+            MANY_ORDINALS[thread::threads],
+            MANY_DELTAS[thread::threads],
+        )
+        for thread in range(threads)
+    ]
+    with concurrent.futures.ThreadPoolExecutor(threads) as executor:
+        benchmark(lambda: list(executor.map(lambda args: operation(*args), chunks)))
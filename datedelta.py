@@ -1,4 +1,9 @@
+# Other modules are imported where they're needed, in order to keep importing
+# this module fast. It's imported by short-lived processes such as CLI tools.
+
+import _thread
 import datetime
+import sys
 
 
 class datedelta:
@@ -20,6 +25,98 @@ class datedelta:
         self._months = int_months
         self._days = int_days
 
+    @classmethod
+    def _from_ints(cls, years, months, days):
+        # Create a datedelta without validating arguments, which must be int.
+        # This is faster than __init__ in code paths that guarantee it.
+        # Subclasses may override __init__, so they still go through it.
+        if cls is not datedelta:
+            return cls(years=years, months=months, days=days)
+        self = object.__new__(cls)
+        self._years = years
+        self._months = months
+        self._days = days
+        return self
+
+    @classmethod
+    def intern(cls, *, years=0, months=0, days=0):
+        """
+        Return a datedelta equal to ``datedelta(years=..., months=..., days=...)``.
+
+        Instances are shared: interning the same value again returns the same
+        instance, as long as it's still in the interning cache. This saves
+        allocations when an application creates many identical datedeltas.
+
+        The interning cache keeps the most recently used instances. Use
+        :func:`set_intern_cache_size` to configure its size and
+        :func:`intern_cache_info` to tune it.
+
+        Interning is thread-safe. However, when several threads intern the
+        same value for the first time concurrently, they may get different
+        instances.
+
+        """
+        return (_intern or _load_intern())(cls, years, months, days)
+
+    @classmethod
+    def between(cls, start, end):
+        """
+        Return the datedelta such that ``start + datedelta == end``.
+
+        The result has the largest possible number of months, expressed in
+        years and months when that gives the same result; days cover the rest.
+        Its components are all non-negative when ``start <= end`` and all
+        non-positive otherwise.
+
+        Raise :exc:`ValueError` if there's no such datedelta, which happens
+        when ``start`` and ``end`` are datetimes with different times.
+
+        """
+        months = (end.year - start.year) * 12 + end.month - start.month
+        # Adjust the estimate to the number of months that gets as close as
+        # possible to end without overshooting. Since start + n * MONTH is
+        # increasing with n, this takes at most a few iterations. When start
+        # <= end, the estimate is never too small because start + (months + 1)
+        # * MONTH is in a month after the month of end.
+        if start <= end:
+            # Probes are in the month of end or, when rolling forward, in the
+            # next month, which exists because December has 31 days.
+            while start + cls(months=months) > end:
+                months -= 1
+        else:
+            # Stop probing before January of year 1, which isn't representable
+            # and would be before end anyway. index is the month index of start.
+            index = start.year * 12 + start.month - 13
+            while start + cls(months=months) < end:
+                months += 1
+            while index + months > 0 and start + cls(months=months - 1) >= end:
+                months -= 1
+        intermediate = start + cls(months=months)
+
+        # Express months in years and months, unless adding years then months
+        # doesn't give the same intermediate result, e.g. from February 29th.
+        years, remainder = divmod(abs(months), 12)
+        if months < 0:
+            years, remainder = -years, -remainder
+        if years:
+            try:
+                same = start + cls(years=years, months=remainder) == intermediate
+            except ValueError:
+                # Adding years rolled forward from February 29th to March 1st,
+                # then adding months went past December 9999.
+                same = False
+            if not same:
+                years, remainder = 0, months
+
+        result = cls(
+            years=years,
+            months=remainder,
+            days=(end - intermediate).days,
+        )
+        if start + result != end:
+            raise ValueError("there's no datedelta from start to end")
+        return result
+
     # datedelta must be immutable to be hashable.
 
     @property
@@ -34,6 +131,26 @@ class datedelta:
     def days(self):
         return self._days
 
+    @property
+    def total_months(self):
+        """
+        Number of months in this datedelta, counting years as 12 months.
+
+        """
+        return self._years * 12 + self._months
+
+    @property
+    def sort_key(self):
+        """
+        Key defining the ordering of datedeltas.
+
+        This is ``(total_months, days, years)``. Comparing keys is equivalent
+        to comparing datedeltas and faster when keys are reused, for example
+        with :func:`bisect.bisect` or :mod:`heapq`.
+
+        """
+        return self._years * 12 + self._months, self._days, self._years
+
     def __repr__(self):
         args = []
         if self._years != 0:
@@ -54,6 +171,66 @@ class datedelta:
             bits.append(f"{self._days} day{_s(self._days)}")
         return ", ".join(bits) or "0 days"
 
+    @classmethod
+    def fromisoformat(cls, string):
+        """
+        Create a datedelta from an ISO 8601 duration such as ``P1Y2M10D``.
+
+        Years, months, weeks, and days are supported. Time components and
+        fractional values aren't. A leading ``-`` makes all components
+        negative. Components may also have their own sign, like in the output
+        of :meth:`isoformat`.
+
+        """
+        sign, body = 1, string
+        if body[:1] == "-":
+            sign, body = -1, body[1:]
+        if body[:1] != "P" or len(body) == 1:
+            raise ValueError(f"invalid ISO 8601 duration: {string!r}")
+
+        # Splitting on each unit in order rejects components in the wrong
+        # order, time components, and anything else that isn't a number.
+        rest = body[1:]
+        values = []
+        for unit, name in _ISO_UNITS:
+            value, found, remainder = rest.partition(unit)
+            if found:
+                values.append(_parse_component(value, name, string))
+                rest = remainder
+            else:
+                values.append(0)
+        if rest:
+            raise ValueError(f"invalid ISO 8601 duration: {string!r}")
+
+        years, months, weeks, days = values
+        return cls(
+            years=sign * years,
+            months=sign * months,
+            days=sign * (weeks * 7 + days),
+        )
+
+    def isoformat(self):
+        """
+        Return an ISO 8601 duration such as ``P1Y2M10D``.
+
+        When all components are negative or zero, the result starts with
+        ``-``. When components have different signs, each component has its
+        own sign, which is an extension of ISO 8601.
+
+        """
+        years, months, days = self._years, self._months, self._days
+        bits = ["P"]
+        if years <= 0 and months <= 0 and days <= 0 and (years or months or days):
+            bits = ["-P"]
+            years, months, days = -years, -months, -days
+        if years:
+            bits.append(f"{years}Y")
+        if months:
+            bits.append(f"{months}M")
+        if days or not (years or months):
+            bits.append(f"{days}D")
+        return "".join(bits)
+
     def __eq__(self, other):
         if isinstance(other, datedelta):
             return (
@@ -77,6 +254,34 @@ class datedelta:
     def __hash__(self):
         return hash((self._years, self._months, self._days))
 
+    # Datedeltas are ordered by total number of months, then by days. Years
+    # break ties between e.g. datedelta(months=12) and datedelta(years=1) in
+    # order to keep ordering consistent with equality.
+
+    def __lt__(self, other):
+        if isinstance(other, datedelta):
+            return self.sort_key < other.sort_key
+
+        return NotImplemented
+
+    def __le__(self, other):
+        if isinstance(other, datedelta):
+            return self.sort_key <= other.sort_key
+
+        return NotImplemented
+
+    def __gt__(self, other):
+        if isinstance(other, datedelta):
+            return self.sort_key > other.sort_key
+
+        return NotImplemented
+
+    def __ge__(self, other):
+        if isinstance(other, datedelta):
+            return self.sort_key >= other.sort_key
+
+        return NotImplemented
+
     def __add__(self, other):
         if isinstance(other, datedelta):
             if (
@@ -84,10 +289,10 @@ class datedelta:
                 and self._months * other._months >= 0
                 and self._days * other._days >= 0
             ):
-                return self.__class__(
-                    years=self._years + other._years,
-                    months=self._months + other._months,
-                    days=self._days + other._days,
+                return self._from_ints(
+                    self._years + other._years,
+                    self._months + other._months,
+                    self._days + other._days,
                 )
             else:
                 raise ValueError("cannot add datedeltas with opposite signs")
@@ -101,10 +306,10 @@ class datedelta:
                 and self._months * other._months <= 0
                 and self._days * other._days <= 0
             ):
-                return self.__class__(
-                    years=self._years - other._years,
-                    months=self._months - other._months,
-                    days=self._days - other._days,
+                return self._from_ints(
+                    self._years - other._years,
+                    self._months - other._months,
+                    self._days - other._days,
                 )
             else:
                 raise ValueError("cannot subtract datedeltas with same signs")
@@ -113,10 +318,10 @@ class datedelta:
 
     def __mul__(self, other):
         if isinstance(other, int):
-            return self.__class__(
-                years=self._years * other,
-                months=self._months * other,
-                days=self._days * other,
+            return self._from_ints(
+                self._years * other,
+                self._months * other,
+                self._days * other,
             )
 
         return NotImplemented
@@ -133,7 +338,8 @@ class datedelta:
             if self._years:
                 year += self._years
                 # Adjust the month and day if the target day doesn't exist.
-                if day > _days_in_month(year, month):
+                # All months have at least 28 days: skip the check if possible.
+                if day > 28 and day > _days_in_month(year, month):
                     # This branch is never taken when month == 12 because day is
                     # always in 1..31 and because December has 31 days.
                     month += 1
@@ -147,17 +353,41 @@ class datedelta:
                 year += dyear
                 month = month0 + 1
                 # Adjust the month and day if the target day doesn't exist.
-                if day > _days_in_month(year, month):
+                # All months have at least 28 days: skip the check if possible.
+                if day > 28 and day > _days_in_month(year, month):
                     # This branch is never taken when month == 12 because day is
                     # always in 1..31 and because December has 31 days.
                     month += 1
                     day = 1
 
-            result = other.replace(year, month, day)
+            if type(other) is datetime.date:
+                # Avoid creating an intermediate object when there's no change.
+                if self._years or self._months:
+                    result = datetime.date(year, month, day)
+                else:
+                    result = other
+
+                # Add days.
+                if self._days:
+                    result += datetime.timedelta(days=self._days)
+
+                return result
+
+            # For subclasses such as datetime.datetime, create the result in a
+            # single step, which preserves the time and tzinfo. Without days,
+            # that's replace(). With days, that's adding the difference in days
+            # with a timedelta, which is faster than replace() then adding days.
+            if not self._days:
+                return other.replace(year, month, day)
 
-            # Add days.
-            if self._days:
-                result += datetime.timedelta(days=self._days)
+            days = self._days
+            if self._years or self._months:
+                days += datetime.date(year, month, day).toordinal() - other.toordinal()
+            result = other + datetime.timedelta(days=days)
+
+            # Adding a timedelta resets fold. Restore it.
+            if getattr(other, "fold", 0):
+                result = result.replace(fold=1)
 
             return result
 
@@ -175,7 +405,8 @@ class datedelta:
             if self._years:
                 year -= self._years
                 # Adjust the month and day if the target day doesn't exist.
-                if day > _days_in_month(year, month):
+                # All months have at least 28 days: skip the check if possible.
+                if day > 28 and day > _days_in_month(year, month):
                     # This branch is never taken when month == 12 because day is
                     # always in 1..31 and because December has 31 days.
                     month += 1
@@ -189,30 +420,97 @@ class datedelta:
                 year += dyear
                 month = month0 + 1
                 # Adjust the month and day if the target day doesn't exist.
-                if day > _days_in_month(year, month):
+                # All months have at least 28 days: skip the check if possible.
+                if day > 28 and day > _days_in_month(year, month):
                     # This branch is never taken when month == 12 because day is
                     # always in 1..31 and because December has 31 days.
                     month += 1
                     day = 1
 
-            result = other.replace(year, month, day)
+            if type(other) is datetime.date:
+                # Avoid creating an intermediate object when there's no change.
+                if self._years or self._months:
+                    result = datetime.date(year, month, day)
+                else:
+                    result = other
+
+                # Subtract days.
+                if self._days:
+                    result -= datetime.timedelta(days=self._days)
+
+                return result
+
+            # For subclasses such as datetime.datetime, create the result in a
+            # single step, which preserves the time and tzinfo. Without days,
+            # that's replace(). With days, that's adding the difference in days
+            # with a timedelta, which is faster than replace() then adding days.
+            if not self._days:
+                return other.replace(year, month, day)
 
-            # Subtract days.
-            if self._days:
-                result -= datetime.timedelta(days=self._days)
+            days = -self._days
+            if self._years or self._months:
+                days += datetime.date(year, month, day).toordinal() - other.toordinal()
+            result = other + datetime.timedelta(days=days)
+
+            # Adding a timedelta resets fold. Restore it.
+            if getattr(other, "fold", 0):
+                result = result.replace(fold=1)
 
             return result
 
         return NotImplemented
 
+    def apply_many(self, dates, *, subtract=False):
+        """
+        Add this datedelta to each date in ``dates`` and return a list.
+
+        If ``subtract`` is true, subtract this datedelta instead.
+
+        The result is the same as ``[date + delta for date in dates]`` or
+        ``[date - delta for date in dates]``. The work that depends only on the
+        datedelta is done once rather than per date. This is much faster for
+        days only, faster for days combined with years or months, and about as
+        fast as a loop for years or months only.
+
+        """
+        if subtract:
+            years, months, days = -self._years, -self._months, -self._days
+        else:
+            years, months, days = self._years, self._months, self._days
+        timedelta = datetime.timedelta(days=days)
+        total = years * 12 + months - 13
+        date = datetime.date
+        fromordinal = date.fromordinal
+        _load_tables()
+
+        result = []
+        append = result.append
+        for other in dates:
+            # Subclasses such as datetime.datetime go through the slow path.
+            if type(other) is not date:
+                append(other - self if subtract else other + self)
+            elif not years and not months:
+                append(other + timedelta)
+            else:
+                # All months have at least 28 days: skip _shift_index if possible.
+                day = other.day
+                if day > 28:
+                    index, day = _shift_index(
+                        other.year, other.month, day, years, months
+                    )
+                else:
+                    index = other.year * 12 + other.month + total
+                if days:
+                    append(fromordinal(_check_ordinal(_ordinal(index, day) + days)))
+                else:
+                    year, month0 = divmod(index, 12)
+                    append(date(year + 1, month0 + 1, day))
+        return result
+
     __rmul__ = __mul__
 
     def __neg__(self):
-        return self.__class__(
-            years=-self._years,
-            months=-self._months,
-            days=-self._days,
-        )
+        return self._from_ints(-self._years, -self._months, -self._days)
 
     def __pos__(self):
         return self
@@ -225,6 +523,1604 @@ class datedelta:
     def __setstate__(self, state):
         self._years, self._months, self._days = state
 
+    # Compact binary serialization.
+
+    def to_bytes(self):
+        """
+        Return a 12-bytes representation of this datedelta.
+
+        Years, months, and days are encoded as 32-bit little-endian signed
+        integers. :func:`encode_many` uses the same format.
+
+        """
+        try:
+            return (_STRUCT or _load_struct()).pack(
+                self._years, self._months, self._days
+            )
+        except _STRUCT_ERROR:
+            raise OverflowError("datedelta too large to convert to bytes") from None
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Create a datedelta from the output of :meth:`to_bytes`.
+
+        """
+        try:
+            years, months, days = (_STRUCT or _load_struct()).unpack(data)
+        except _STRUCT_ERROR:
+            raise ValueError("expected 12 bytes") from None
+        return cls._from_ints(years, months, days)
+
+
+class DatedeltaArray:
+    """
+    Sequence of datedeltas stored in a compact, columnar format.
+
+    Years, months, and days are stored in three ``array.array("i")``. The
+    :attr:`years`, :attr:`months`, and :attr:`days` properties expose them as
+    read-only memory views, without copying.
+
+    Indexing returns :class:`datedelta` instances. Arithmetic operations are
+    applied elementwise and follow the same rules as with :class:`datedelta`.
+    The other operand can be a :class:`DatedeltaArray` of the same length or a
+    :class:`datedelta`, which is applied to each element.
+
+    """
+
+    __slots__ = ["_years", "_months", "_days"]
+
+    def __init__(self, deltas=()):
+        import array
+
+        years = array.array("i")
+        months = array.array("i")
+        days = array.array("i")
+        for delta in deltas:
+            years.append(delta._years)
+            months.append(delta._months)
+            days.append(delta._days)
+        self._years = years
+        self._months = months
+        self._days = days
+
+    @classmethod
+    def from_components(cls, years, months, days):
+        """
+        Create a :class:`DatedeltaArray` from sequences of years, months, and
+        days, for example arrays or memory views of integers.
+
+        """
+        import array
+
+        self = cls.__new__(cls)
+        self._years = array.array("i", years)
+        self._months = array.array("i", months)
+        self._days = array.array("i", days)
+        if not len(self._years) == len(self._months) == len(self._days):
+            raise ValueError("years, months, and days must have the same length")
+        return self
+
+    @classmethod
+    def concat(cls, arrays):
+        """
+        Concatenate :class:`DatedeltaArray` instances.
+
+        """
+        self = cls()
+        for other in arrays:
+            self._years.extend(other._years)
+            self._months.extend(other._months)
+            self._days.extend(other._days)
+        return self
+
+    def take(self, indices):
+        """
+        Return a :class:`DatedeltaArray` with the elements at ``indices``.
+
+        """
+        indices = list(indices)
+        years, months, days = self._years, self._months, self._days
+        return self.from_components(
+            [years[index] for index in indices],
+            [months[index] for index in indices],
+            [days[index] for index in indices],
+        )
+
+    def argsort(self):
+        """
+        Return the indices that sort this array, as an ``array.array("i")``.
+
+        Elements are sorted like :class:`datedelta` instances. The sort is
+        stable. ``take(argsort())`` returns a sorted array.
+
+        """
+        import array
+
+        keys = [
+            (years * 12 + months, days, years)
+            for years, months, days in zip(self._years, self._months, self._days)
+        ]
+        return array.array("i", sorted(range(len(keys)), key=keys.__getitem__))
+
+    @property
+    def years(self):
+        return memoryview(self._years).toreadonly()
+
+    @property
+    def months(self):
+        return memoryview(self._months).toreadonly()
+
+    @property
+    def days(self):
+        return memoryview(self._days).toreadonly()
+
+    def __len__(self):
+        return len(self._years)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.from_components(
+                self._years[index],
+                self._months[index],
+                self._days[index],
+            )
+        return datedelta._from_ints(
+            self._years[index],
+            self._months[index],
+            self._days[index],
+        )
+
+    def __iter__(self):
+        for years, months, days in zip(self._years, self._months, self._days):
+            yield datedelta._from_ints(years, months, days)
+
+    def __repr__(self):
+        return f"datedelta.DatedeltaArray({list(self)!r})"
+
+    def __eq__(self, other):
+        if isinstance(other, DatedeltaArray):
+            return (
+                self._years == other._years
+                and self._months == other._months
+                and self._days == other._days
+            )
+
+        return NotImplemented
+
+    __hash__ = None
+
+    def _components(self, other):
+        # Return components of the other operand of an elementwise operation.
+        import itertools
+
+        if isinstance(other, DatedeltaArray):
+            if len(other) != len(self):
+                raise ValueError("arrays must have the same length")
+            return other._years, other._months, other._days
+        if isinstance(other, datedelta):
+            return (
+                itertools.repeat(other._years),
+                itertools.repeat(other._months),
+                itertools.repeat(other._days),
+            )
+        return None
+
+    def __add__(self, other):
+        components = self._components(other)
+        if components is None:
+            return NotImplemented
+
+        import array
+
+        years = array.array("i")
+        months = array.array("i")
+        days = array.array("i")
+        for years_1, months_1, days_1, years_2, months_2, days_2 in zip(
+            self._years, self._months, self._days, *components
+        ):
+            if years_1 * years_2 < 0 or months_1 * months_2 < 0 or days_1 * days_2 < 0:
+                raise ValueError("cannot add datedeltas with opposite signs")
+            years.append(years_1 + years_2)
+            months.append(months_1 + months_2)
+            days.append(days_1 + days_2)
+        return self.from_components(years, months, days)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        components = self._components(other)
+        if components is None:
+            return NotImplemented
+
+        import array
+
+        years = array.array("i")
+        months = array.array("i")
+        days = array.array("i")
+        for years_1, months_1, days_1, years_2, months_2, days_2 in zip(
+            self._years, self._months, self._days, *components
+        ):
+            if years_1 * years_2 > 0 or months_1 * months_2 > 0 or days_1 * days_2 > 0:
+                raise ValueError("cannot subtract datedeltas with same signs")
+            years.append(years_1 - years_2)
+            months.append(months_1 - months_2)
+            days.append(days_1 - days_2)
+        return self.from_components(years, months, days)
+
+    def __rsub__(self, other):
+        result = self.__sub__(other)
+        if result is NotImplemented:
+            return result
+        return -result
+
+    def __mul__(self, other):
+        if isinstance(other, int):
+            return self.from_components(
+                [years * other for years in self._years],
+                [months * other for months in self._months],
+                [days * other for days in self._days],
+            )
+
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return self * -1
+
+    def __pos__(self):
+        return self
+
+
+class Recurrence:
+    """
+    Dates recurring every ``delta`` from ``anchor``.
+
+    Occurrences are ``anchor + n * delta`` for ``n >= 0``. Each occurrence is
+    computed from ``anchor``, so there's no drift at month ends.
+
+    ``delta`` must be positive. Finding an occurrence takes constant time,
+    regardless of how far it is from ``anchor``.
+
+    """
+
+    __slots__ = ["_anchor", "_delta"]
+
+    def __init__(self, anchor, delta):
+        _check_positive(delta)
+        self._anchor = anchor
+        self._delta = delta
+
+    @property
+    def anchor(self):
+        return self._anchor
+
+    @property
+    def delta(self):
+        return self._delta
+
+    def __repr__(self):
+        return f"datedelta.Recurrence({self._anchor!r}, {self._delta!r})"
+
+    def nth(self, n):
+        """
+        Return occurrence ``n``, counting from 0.
+
+        """
+        if n < 0:
+            raise ValueError("n must be non-negative")
+        return self._anchor + n * self._delta
+
+    def next_on_or_after(self, date):
+        """
+        Return the first occurrence on or after ``date``.
+
+        Return ``None`` if it's after the end of the calendar.
+
+        """
+        return _nth_period(self._anchor, self._next_index(date), self._delta)
+
+    def between(self, start, end):
+        """
+        Generate occurrences on or after ``start`` and before ``end``.
+
+        Stop at the end of the calendar if ``end`` is later than the last
+        occurrence that can be represented.
+
+        """
+        n = self._next_index(start)
+        result = _nth_period(self._anchor, n, self._delta)
+        while result is not None and result < end:
+            yield result
+            n += 1
+            result = _nth_period(self._anchor, n, self._delta)
+
+    def _next_index(self, date):
+        # Return the index of the first occurrence on or after date.
+        if date <= self._anchor:
+            return 0
+        n, result = periods_between(self._anchor, date, self._delta)
+        return n if result == date else n + 1
+
+
+def next_occurrences(anchors, delta, date):
+    """
+    Return the first occurrence on or after ``date`` for each anchor.
+
+    This is equivalent to ``[Recurrence(anchor, delta).next_on_or_after(date)
+    for anchor in anchors]`` and returns a list. It contains ``None`` for
+    anchors whose next occurrence is after the end of the calendar.
+
+    """
+    _check_positive(delta)
+    result = []
+    append = result.append
+    for anchor in anchors:
+        if date <= anchor:
+            append(anchor)
+            continue
+        n, occurrence = periods_between(anchor, date, delta)
+        if occurrence != date:
+            occurrence = _nth_period(anchor, n + 1, delta)
+        append(occurrence)
+    return result
+
+
+class BusinessCalendar:
+    """
+    Business days between ``start`` and ``end``, inclusive.
+
+    Days whose weekday, as returned by ``datetime.date.weekday()``, is in
+    ``weekend`` aren't business days. Neither are ``holidays``. Holidays
+    outside of the calendar's range are ignored.
+
+    The calendar precomputes the number of business days before each date in
+    its range. Then, all operations take constant time. Operations on dates
+    outside of this range raise :exc:`ValueError`.
+
+    """
+
+    __slots__ = ["_start", "_end", "_counts", "_business_days"]
+
+    def __init__(self, start, end, *, holidays=(), weekend=(5, 6)):
+        import array
+
+        if end < start:
+            raise ValueError("end must not be before start")
+        self._start = start.toordinal()
+        self._end = end.toordinal()
+        holidays = {holiday.toordinal() for holiday in holidays}
+        weekend = set(weekend)
+
+        # _counts[offset] is the number of business days in the calendar before
+        # the date at offset, which is also the index in _business_days of the
+        # first business day on or after that date.
+        counts = array.array("i", [0])
+        business_days = array.array("i")
+        for ordinal in range(self._start, self._end + 1):
+            # Ordinal 1 is a Monday, whose weekday() is 0.
+            if (ordinal - 1) % 7 not in weekend and ordinal not in holidays:
+                business_days.append(ordinal)
+            counts.append(len(business_days))
+        self._counts = counts
+        self._business_days = business_days
+
+    @property
+    def start(self):
+        return datetime.date.fromordinal(self._start)
+
+    @property
+    def end(self):
+        return datetime.date.fromordinal(self._end)
+
+    def is_business_day(self, date):
+        """
+        Return whether ``date`` is a business day.
+
+        """
+        offset = self._offset(date.toordinal())
+        return self._counts[offset + 1] > self._counts[offset]
+
+    def roll_forward(self, date):
+        """
+        Return the first business day on or after ``date``.
+
+        """
+        # This is add_business_days(date, 0), inlined for performance.
+        ordinal = date.toordinal()
+        offset = ordinal - self._start
+        if not 0 <= offset <= self._end - self._start:
+            raise ValueError("date is outside of the calendar's range")
+        index = self._counts[offset]
+        if index < self._counts[offset + 1]:
+            return date
+        if index == len(self._business_days):
+            raise ValueError("result is outside of the calendar's range")
+        # Adding a timedelta preserves the type and the time of datetimes.
+        return date + datetime.timedelta(days=self._business_days[index] - ordinal)
+
+    def add_business_days(self, date, n):
+        """
+        Return the business day ``n`` business days after ``date``.
+
+        If ``date`` isn't a business day, it's rolled forward first. ``n`` may
+        be negative.
+
+        """
+        ordinal = date.toordinal()
+        target = self._business_day(ordinal, n)
+        if target == ordinal:
+            return date
+        # Adding a timedelta preserves the type and the time of datetimes.
+        return date + datetime.timedelta(days=target - ordinal)
+
+    def business_days_between(self, start, end):
+        """
+        Count business days on or after ``start`` and before ``end``.
+
+        The result is negative if ``end`` is before ``start``. Since the later
+        date is excluded, it may be the day after the calendar's end.
+
+        """
+        counts = self._counts
+        size = len(counts) - 1
+        start = start.toordinal() - self._start
+        end = end.toordinal() - self._start
+        if not (0 <= min(start, end) < size and max(start, end) <= size):
+            raise ValueError("date is outside of the calendar's range")
+        return counts[end] - counts[start]
+
+    def add(self, date, delta):
+        """
+        Return the first business day on or after ``date + delta``.
+
+        """
+        return self.roll_forward(date + delta)
+
+    def roll_forward_array(self, ordinals):
+        """
+        Apply :meth:`roll_forward` to dates represented by their ordinals.
+
+        Return an ``array.array("i")`` of ordinals, like :func:`add_array`.
+
+        """
+        return self.add_business_days_array(ordinals, 0)
+
+    def add_business_days_array(self, ordinals, n):
+        """
+        Apply :meth:`add_business_days` to dates represented by their ordinals.
+
+        Return an ``array.array("i")`` of ordinals, like :func:`add_array`.
+
+        """
+        import array
+
+        start, size = self._start, self._end - self._start + 1
+        counts, business_days = self._counts, self._business_days
+        limit = len(business_days)
+        result = array.array("i")
+        append = result.append
+        for ordinal in ordinals:
+            offset = ordinal - start
+            if not 0 <= offset < size:
+                raise ValueError("date is outside of the calendar's range")
+            index = counts[offset] + n
+            if not 0 <= index < limit:
+                raise ValueError("result is outside of the calendar's range")
+            append(business_days[index])
+        return result
+
+    def add_array(self, ordinals, delta):
+        """
+        Apply :meth:`add` to dates represented by their ordinals.
+
+        Return an ``array.array("i")`` of ordinals, like :func:`add_array`.
+
+        """
+        return self.add_business_days_array(add_array(ordinals, delta), 0)
+
+    def _offset(self, ordinal):
+        # Return the offset of a date in the calendar.
+        if not self._start <= ordinal <= self._end:
+            raise ValueError("date is outside of the calendar's range")
+        return ordinal - self._start
+
+    def _business_day(self, ordinal, n):
+        # Return the ordinal of the n-th business day after the date, rolled
+        # forward to a business day.
+        index = self._counts[self._offset(ordinal)] + n
+        if not 0 <= index < len(self._business_days):
+            raise ValueError("result is outside of the calendar's range")
+        return self._business_days[index]
+
+
+# Interning cache for datedelta.intern().
+
+_INTERN_CACHE_SIZE = 1024
+
+
+def _new(cls, years, months, days):
+    return cls(years=years, months=months, days=days)
+
+
+# The cache is created on first use, which avoids importing functools until
+# it's needed. If several threads create it concurrently, dict.setdefault()
+# makes them all use the same cache, so interned instances are still shared.
+
+_intern = None
+
+_caches = {}
+
+
+def _load_intern():
+    import functools
+
+    global _intern
+    cache = functools.lru_cache(maxsize=_INTERN_CACHE_SIZE)(_new)
+    _intern = _caches.setdefault("intern", cache)
+    return _intern
+
+
+def set_intern_cache_size(maxsize):
+    """
+    Set the maximum number of instances in the interning cache.
+
+    ``None`` removes the limit. This clears the interning cache.
+
+    """
+    import functools
+
+    global _intern
+    _intern = _caches["intern"] = functools.lru_cache(maxsize=maxsize)(_new)
+
+
+def intern_cache_info():
+    """
+    Return statistics about the interning cache.
+
+    The result is a named tuple with ``hits``, ``misses``, ``maxsize``, and
+    ``currsize`` fields, like ``functools.lru_cache`` provides.
+
+    """
+    return (_intern or _load_intern()).cache_info()
+
+
+# Memoization of the results of cached_add() and cached_sub().
+
+_SHIFT_CACHE_SIZE = 4096
+
+
+def _shift(ordinal, years, months, days):
+    return datetime.date.fromordinal(ordinal) + datedelta._from_ints(
+        years, months, days
+    )
+
+
+# The cache is created on first use, like the interning cache.
+
+_shift_cached = None
+
+
+def _load_shift_cached():
+    import functools
+
+    global _shift_cached
+    cache = functools.lru_cache(maxsize=_SHIFT_CACHE_SIZE)(_shift)
+    _shift_cached = _caches.setdefault("shift", cache)
+    return _shift_cached
+
+
+def cached_add(date, delta):
+    """
+    Return ``date + delta``, memoizing the result.
+
+    This is faster than ``date + delta`` when the same dates are shifted by the
+    same datedeltas repeatedly. Results are cached for ``datetime.date`` only;
+    ``datetime.datetime`` and other subclasses aren't cached.
+
+    The cache keeps the 4096 most recently used results by default. Use
+    :func:`set_shift_cache_size` to configure its size and
+    :func:`shift_cache_info` to tune it. It's safe to use in multiple threads.
+
+    """
+    if type(date) is not datetime.date:
+        return date + delta
+    return (_shift_cached or _load_shift_cached())(
+        date.toordinal(), delta._years, delta._months, delta._days
+    )
+
+
+def cached_sub(date, delta):
+    """
+    Return ``date - delta``, memoizing the result.
+
+    This shares its cache with :func:`cached_add`.
+
+    """
+    if type(date) is not datetime.date:
+        return date - delta
+    # Subtracting a datedelta is the same as adding its opposite.
+    return (_shift_cached or _load_shift_cached())(
+        date.toordinal(), -delta._years, -delta._months, -delta._days
+    )
+
+
+def set_shift_cache_size(maxsize):
+    """
+    Set the maximum number of results in the cache of :func:`cached_add` and
+    :func:`cached_sub`.
+
+    ``None`` removes the limit. This clears the cache.
+
+    """
+    import functools
+
+    global _shift_cached
+    _shift_cached = _caches["shift"] = functools.lru_cache(maxsize=maxsize)(_shift)
+
+
+def shift_cache_info():
+    """
+    Return statistics about the cache of :func:`cached_add` and
+    :func:`cached_sub`.
+
+    The result is a named tuple with ``hits``, ``misses``, ``maxsize``, and
+    ``currsize`` fields, like ``functools.lru_cache`` provides.
+
+    """
+    return (_shift_cached or _load_shift_cached()).cache_info()
+
+
+# Compact binary serialization of many datedeltas.
+
+# Format of datedelta.to_bytes() and datedelta.from_bytes() and the exception
+# it raises. They're created on first use, which avoids importing struct until
+# it's needed. Both methods load them before they can raise _STRUCT_ERROR, so
+# it's always set when it's caught.
+
+_STRUCT = None
+
+_STRUCT_ERROR = None
+
+
+def _load_struct():
+    import struct
+
+    global _STRUCT, _STRUCT_ERROR
+    # Set _STRUCT last, so other threads never see it without _STRUCT_ERROR.
+    _STRUCT_ERROR = struct.error
+    _STRUCT = struct.Struct("<iii")
+    return _STRUCT
+
+
+def encode_many(deltas):
+    """
+    Encode datedeltas in a contiguous buffer and return it as bytes.
+
+    ``deltas`` is a :class:`DatedeltaArray` or an iterable of datedeltas.
+
+    Each datedelta takes 12 bytes, in the format of :meth:`datedelta.to_bytes`.
+
+    """
+    import array
+
+    if not isinstance(deltas, DatedeltaArray):
+        deltas = DatedeltaArray(deltas)
+    values = array.array("i", [0]) * (3 * len(deltas))
+    values[0::3] = deltas._years
+    values[1::3] = deltas._months
+    values[2::3] = deltas._days
+    if sys.byteorder == "big":  # pragma: no cover
+        values.byteswap()
+    return values.tobytes()
+
+
+def decode_many(data):
+    """
+    Decode the output of :func:`encode_many` and return a
+    :class:`DatedeltaArray`.
+
+    ``data`` is any bytes-like object. Decoding doesn't create a datedelta for
+    each value. The :class:`DatedeltaArray` creates them when they're accessed.
+
+    """
+    import array
+
+    values = array.array("i")
+    try:
+        values.frombytes(data)
+    except ValueError:
+        raise ValueError("length must be a multiple of 12") from None
+    if len(values) % 3:
+        raise ValueError("length must be a multiple of 12")
+    if sys.byteorder == "big":  # pragma: no cover
+        values.byteswap()
+    return DatedeltaArray.from_components(values[0::3], values[1::3], values[2::3])
+
+
+# Parsing ISO 8601 durations.
+
+
+def parse_many(strings):
+    """
+    Create datedeltas from ISO 8601 durations and return a list.
+
+    This is faster than calling :meth:`datedelta.fromisoformat` repeatedly when
+    ``strings`` contains many identical values, because each distinct value is
+    parsed only once. Identical values give the same datedelta instance.
+
+    """
+    cache = {}
+    result = []
+    append = result.append
+    for string in strings:
+        delta = cache.get(string)
+        if delta is None:
+            delta = cache[string] = datedelta.fromisoformat(string)
+        append(delta)
+    return result
+
+
+_ISO_UNITS = [("Y", "years"), ("M", "months"), ("W", "days"), ("D", "days")]
+
+
+def _parse_component(value, name, string):
+    digits = value[1:] if value.startswith(("+", "-")) else value
+    # int() would also accept whitespace, underscores, and non-ASCII digits.
+    if digits.isascii() and digits.isdigit():
+        return int(value)
+    if "." in value or "," in value:
+        raise ValueError(f"{name} must be an integer value")
+    raise ValueError(f"invalid ISO 8601 duration: {string!r}")
+
+
+# Batch operations on dates represented by their proleptic Gregorian ordinals.
+
+
+def add_array(ordinals, delta, *, workers=None):
+    """
+    Add ``delta`` to each date in ``ordinals``.
+
+    Dates are represented by their proleptic Gregorian ordinals, as returned by
+    ``datetime.date.toordinal()``. Return an ``array.array("i")`` of ordinals.
+
+    ``delta`` is a :class:`datedelta` or a :class:`DatedeltaArray` containing
+    one datedelta for each date.
+
+    The result is the same as ``date + delta`` for each date.
+
+    If ``workers`` is greater than 1, the work is split across that many
+    processes, including the current process. Dates and datedeltas are shared
+    with worker processes through shared memory rather than pickled.
+
+    """
+    if workers is not None and workers > 1:
+        return _parallel_shift(ordinals, delta, 1, workers)
+    if isinstance(delta, DatedeltaArray):
+        return _shift_arrays(ordinals, delta, 1)
+    return _shift_array(ordinals, delta._years, delta._months, delta._days)
+
+
+def sub_array(ordinals, delta, *, workers=None):
+    """
+    Subtract ``delta`` from each date in ``ordinals``.
+
+    Dates are represented by their proleptic Gregorian ordinals, as returned by
+    ``datetime.date.toordinal()``. Return an ``array.array("i")`` of ordinals.
+
+    ``delta`` is a :class:`datedelta` or a :class:`DatedeltaArray` containing
+    one datedelta for each date.
+
+    The result is the same as ``date - delta`` for each date.
+
+    If ``workers`` is greater than 1, the work is split across that many
+    processes, like with :func:`add_array`.
+
+    """
+    if workers is not None and workers > 1:
+        return _parallel_shift(ordinals, delta, -1, workers)
+    if isinstance(delta, DatedeltaArray):
+        return _shift_arrays(ordinals, delta, -1)
+    return _shift_array(ordinals, -delta._years, -delta._months, -delta._days)
+
+
+def grid(ordinals, deltas):
+    """
+    Add each datedelta in ``deltas`` to each date in ``ordinals``.
+
+    Dates are represented by their proleptic Gregorian ordinals, like with
+    :func:`add_array`. ``deltas`` is a :class:`DatedeltaArray` or an iterable
+    of datedeltas.
+
+    Return a list containing an ``array.array("i")`` of ordinals for each date.
+    Its elements are ``date + delta`` for each delta, in order.
+
+    This is faster than calling :func:`add_array` for each date because the
+    work that depends only on the date or only on the datedelta is done once.
+
+    """
+    import array
+
+    _load_tables()
+    if not isinstance(deltas, DatedeltaArray):
+        deltas = DatedeltaArray(deltas)
+    shifts = list(zip(deltas._years, deltas._months, deltas._days))
+    # Adding years only rolls forward from February 29th, because other
+    # months always have the same length. Otherwise, the result depends only
+    # on the total number of months, which is computed once per datedelta.
+    totals = [years * 12 + months for years, months, _ in shifts]
+    days_list = [days for _, _, days in shifts]
+    lowest = min(totals, default=0)
+    highest = max(totals, default=0)
+    month_ordinals = _MONTH_ORDINALS
+    fromordinal = datetime.date.fromordinal
+
+    result = []
+    for ordinal in ordinals:
+        other = fromordinal(ordinal)
+        year, month, day = other.year, other.month, other.day
+        index = year * 12 + month - 13
+        cycles, base = divmod(index, _CYCLE_MONTHS)
+        # If all target months are in the same 400-year cycle, the result is a
+        # lookup in the table of month ordinals, plus offsets.
+        if (
+            not (month == 2 and day == 29)
+            and base + lowest >= 0
+            and base + highest < _CYCLE_MONTHS
+            and index + highest < _MAX_MONTH_INDEX
+        ):
+            offset = cycles * _CYCLE_DAYS
+            if day <= 28:
+                # All months have at least 28 days.
+                offset += day - 1
+                values = [
+                    month_ordinals[base + months] + offset + days
+                    for months, days in zip(totals, days_list)
+                ]
+            else:
+                # If the target day doesn't exist, this is the first day of
+                # the next month.
+                values = []
+                append = values.append
+                for months, days in zip(totals, days_list):
+                    target = base + months
+                    value = month_ordinals[target] + day - 1
+                    if value >= month_ordinals[target + 1]:
+                        value = month_ordinals[target + 1]
+                    append(value + offset + days)
+            row = array.array("i", values)
+            if row and (min(row) < 1 or max(row) > _MAX_ORDINAL):
+                raise OverflowError("date value out of range")
+        else:
+            row = array.array("i")
+            for years, months, days in shifts:
+                target, target_day = _shift_index(year, month, day, years, months)
+                row.append(_check_ordinal(_ordinal(target, target_day) + days))
+        result.append(row)
+    return result
+
+
+def schedule(start, delta, count):
+    """
+    Generate ``start + n * delta`` for ``n`` in ``range(count)``.
+
+    Each date is computed from ``start``, like in the loop ``for n in
+    range(count): yield start + n * delta``, but without creating ``count``
+    datedelta objects.
+
+    """
+    _load_tables()
+    year, month, day = start.year, start.month, start.day
+    years, months, days = delta._years, delta._months, delta._days
+    fromordinal = datetime.date.fromordinal
+    exact = type(start) is datetime.date
+    for n in range(count):
+        ordinal = _ordinal(*_shift_index(year, month, day, n * years, n * months))
+        result = fromordinal(_check_ordinal(ordinal + n * days))
+        if not exact:
+            # Subclasses such as datetime.datetime keep their other attributes.
+            result = start.replace(result.year, result.month, result.day)
+        yield result
+
+
+def periods_between(start, end, delta):
+    """
+    Count whole periods of ``delta`` between ``start`` and ``end``.
+
+    Return ``(n, start + n * delta)``, where ``n`` is the largest integer such
+    that ``start + n * delta <= end``. The second value is the start of the
+    remaining, incomplete period.
+
+    ``delta`` must be positive and ``end`` must not be before ``start``.
+
+    The computation takes constant time: ``n`` is estimated arithmetically,
+    then corrected by evaluating ``start + n * delta`` a few times.
+
+    """
+    _check_positive(delta)
+    if end < start:
+        raise ValueError("end must not be before start")
+
+    years, months, days = delta._years, delta._months, delta._days
+    total_months = years * 12 + months
+    if not total_months:
+        n = (end - start).days // days
+        return n, start + n * delta
+
+    if not days:
+        # start + n * delta is in the month of index start + n * total_months,
+        # or in the next month if the day doesn't exist. Therefore this
+        # estimate is either exact or one too large.
+        elapsed = (end.year - start.year) * 12 + end.month - start.month
+        n = elapsed // total_months
+    else:
+        # Months last 30.436875 days on average in the Gregorian calendar. This
+        # estimate is off by a small number of periods in the worst case.
+        n = int((end - start).days / (total_months * 30.436875 + days))
+
+    # Periods that end after year 9999 aren't representable. They end after
+    # end anyway.
+    result = _nth_period(start, n, delta)
+    while result is None or result > end:
+        n -= 1
+        result = _nth_period(start, n, delta)
+    while True:
+        next_result = _nth_period(start, n + 1, delta)
+        if next_result is None or next_result > end:
+            return n, result
+        n += 1
+        result = next_result
+
+
+def periods_between_array(start_ordinals, end_ordinals, delta):
+    """
+    Count whole periods of ``delta`` between each date in ``start_ordinals``
+    and the date at the same position in ``end_ordinals``, like
+    :func:`periods_between`.
+
+    Dates are represented by their proleptic Gregorian ordinals, like with
+    :func:`add_array`. Return two ``array.array("i")``: the numbers of periods
+    and the ordinals of the starts of the remaining, incomplete periods.
+
+    """
+    import array
+
+    _check_positive(delta)
+    if len(start_ordinals) != len(end_ordinals):
+        raise ValueError("start and end ordinals must have the same length")
+
+    years, months, days = delta._years, delta._months, delta._days
+    total_months = years * 12 + months
+    counts = array.array("i")
+    results = array.array("i")
+    if not total_months:
+        for start, end in zip(start_ordinals, end_ordinals):
+            if end < start:
+                raise ValueError("end must not be before start")
+            n = (end - start) // days
+            counts.append(n)
+            results.append(start + n * days)
+        return counts, results
+
+    # This is the same algorithm as periods_between(), with month indexes and
+    # ordinals instead of dates.
+    _load_tables()
+    average = total_months * 30.436875 + days
+    fromordinal = datetime.date.fromordinal
+    for start, end in zip(start_ordinals, end_ordinals):
+        if end < start:
+            raise ValueError("end must not be before start")
+        first = fromordinal(start)
+        year, month, day = first.year, first.month, first.day
+        if not days:
+            last = fromordinal(end)
+            n = ((last.year - year) * 12 + last.month - month) // total_months
+        else:
+            n = int((end - start) / average)
+
+        result = _nth_ordinal(year, month, day, n, delta)
+        while result is None or result > end:
+            n -= 1
+            result = _nth_ordinal(year, month, day, n, delta)
+        while True:
+            next_result = _nth_ordinal(year, month, day, n + 1, delta)
+            if next_result is None or next_result > end:
+                break
+            n += 1
+            result = next_result
+        counts.append(n)
+        results.append(result)
+    return counts, results
+
+
+def between_array(start_ordinals, end_ordinals):
+    """
+    Return the datedelta from each date in ``start_ordinals`` to the date at
+    the same position in ``end_ordinals``, like :meth:`datedelta.between`.
+
+    Dates are represented by their proleptic Gregorian ordinals, like with
+    :func:`add_array`. Return a :class:`DatedeltaArray`, without creating a
+    datedelta for each pair of dates.
+
+    """
+    import array
+
+    if len(start_ordinals) != len(end_ordinals):
+        raise ValueError("start and end ordinals must have the same length")
+
+    _load_tables()
+    result_years = array.array("i")
+    result_months = array.array("i")
+    result_days = array.array("i")
+    fromordinal = datetime.date.fromordinal
+    for start, end in zip(start_ordinals, end_ordinals):
+        first = fromordinal(start)
+        last = fromordinal(end)
+        year, month, day = first.year, first.month, first.day
+        # This is the same algorithm as datedelta.between(), with month indexes
+        # and ordinals instead of dates.
+        index = year * 12 + month - 13
+        months = (last.year - year) * 12 + last.month - month
+        if start <= end:
+            while _ordinal(*_shift_index(year, month, day, 0, months)) > end:
+                months -= 1
+        else:
+            while _ordinal(*_shift_index(year, month, day, 0, months)) < end:
+                months += 1
+            while (
+                index + months > 0
+                and _ordinal(*_shift_index(year, month, day, 0, months - 1)) >= end
+            ):
+                months -= 1
+        intermediate = _ordinal(*_shift_index(year, month, day, 0, months))
+
+        years, remainder = divmod(abs(months), 12)
+        if months < 0:
+            years, remainder = -years, -remainder
+        if years:
+            target, target_day = _shift_index(year, month, day, years, remainder)
+            if (
+                target >= _MAX_MONTH_INDEX
+                or _ordinal(target, target_day) != intermediate
+            ):
+                years, remainder = 0, months
+
+        result_years.append(years)
+        result_months.append(remainder)
+        result_days.append(end - intermediate)
+    return DatedeltaArray.from_components(result_years, result_months, result_days)
+
+
+def _check_positive(delta):
+    years, months, days = delta._years, delta._months, delta._days
+    if years < 0 or months < 0 or days < 0 or not (years or months or days):
+        raise ValueError("delta must be positive")
+
+
+def _nth_ordinal(year, month, day, n, delta):
+    # Return the ordinal of start + n * delta, where start is year-month-day,
+    # or None if it's after the end of the calendar.
+    index, day = _shift_index(year, month, day, n * delta._years, n * delta._months)
+    if index >= _MAX_MONTH_INDEX:
+        return None
+    ordinal = _ordinal(index, day) + n * delta._days
+    return ordinal if ordinal <= _MAX_ORDINAL else None
+
+
+def _nth_period(start, n, delta):
+    # Return start + n * delta, or None if it's after the end of the calendar.
+    try:
+        return start + n * delta
+    except (OverflowError, ValueError):
+        return None
+
+
+def _shift_array(ordinals, years, months, days):
+    import array
+
+    result = array.array("i")
+    append = result.append
+
+    # Adding only days doesn't require converting ordinals to dates.
+    if not years and not months:
+        for ordinal in ordinals:
+            append(_check_ordinal(ordinal + days))
+        return result
+
+    # Except from February 29th when adding years, the result depends only on
+    # the total number of months. Dates in the same source month are shifted
+    # by the same number of days, except when the target day doesn't exist,
+    # then the result is the first day of the next month, at limit. This is
+    # computed once for each run of dates in the same month, which is fast
+    # when dates are sorted or clustered.
+    _load_tables()
+    total = years * 12 + months
+    month_ordinals = _MONTH_ORDINALS
+    month_lengths = _MONTH_LENGTHS
+    fromordinal = datetime.date.fromordinal
+    # Range of ordinals in the current source month, excluding February 29th
+    # when adding years; offset to the target month; first day after it.
+    start = stop = offset = limit = 0
+    for ordinal in ordinals:
+        if not start <= ordinal < stop:
+            other = fromordinal(ordinal)
+            year, month, day = other.year, other.month, other.day
+            index = year * 12 + month - 13
+            if years and month == 2 and day == 29:
+                index, day = _shift_index(year, month, day, years, months)
+                append(_check_ordinal(_ordinal(index, day) + days))
+                continue
+            target = index + total
+            if not 0 <= target < _MAX_MONTH_INDEX:
+                raise ValueError(f"year {target // 12 + 1} is out of range")
+            start = ordinal - day + 1
+            if years and month == 2:
+                stop = start + 28
+            else:
+                stop = start + month_lengths[index % _CYCLE_MONTHS]
+            cycles, base = divmod(target, _CYCLE_MONTHS)
+            offset = cycles * _CYCLE_DAYS + month_ordinals[base] - start
+            limit = cycles * _CYCLE_DAYS + month_ordinals[base + 1]
+        value = ordinal + offset
+        if value >= limit:
+            value = limit
+        value += days
+        if not 0 < value <= _MAX_ORDINAL:
+            raise OverflowError("date value out of range")
+        append(value)
+    return result
+
+
+def _shift_arrays(ordinals, deltas, sign):
+    if len(ordinals) != len(deltas):
+        raise ValueError("ordinals and deltas must have the same length")
+
+    import array
+
+    _load_tables()
+    result = array.array("i")
+    append = result.append
+    fromordinal = datetime.date.fromordinal
+    for ordinal, years, months, days in zip(
+        ordinals, deltas._years, deltas._months, deltas._days
+    ):
+        other = fromordinal(ordinal)
+        index, day = _shift_index(
+            other.year, other.month, other.day, sign * years, sign * months
+        )
+        append(_check_ordinal(_ordinal(index, day) + sign * days))
+    return result
+
+
+def _parallel_shift(ordinals, delta, sign, workers):
+    import array
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing import shared_memory
+
+    count = len(ordinals)
+    if isinstance(delta, DatedeltaArray):
+        if len(delta) != count:
+            raise ValueError("ordinals and deltas must have the same length")
+        columns = [ordinals, delta._years, delta._months, delta._days]
+        components = None
+    else:
+        columns = [ordinals]
+        components = sign * delta._years, sign * delta._months, sign * delta._days
+    if not count:
+        return array.array("i")
+
+    # Lay out columns one after the other in shared memory. Results overwrite
+    # ordinals, then they're copied to the return value.
+    itemsize = array.array("i").itemsize
+    memory = shared_memory.SharedMemory(
+        create=True, size=len(columns) * count * itemsize
+    )
+    try:
+        with memory.buf.cast("i") as values:
+            for position, column in enumerate(columns):
+                # Assigning requires the same item format e.g. not "l" or "q".
+                if not isinstance(column, array.array) or column.typecode != "i":
+                    column = array.array("i", column)
+                values[position * count : (position + 1) * count] = column
+
+        bounds = [count * worker // workers for worker in range(workers + 1)]
+        chunks = [
+            (memory.name, count, bounds[worker], bounds[worker + 1], sign, components)
+            for worker in range(workers)
+        ]
+        with ProcessPoolExecutor(workers - 1) as executor:
+            futures = [executor.submit(_shift_shared, *chunk) for chunk in chunks[1:]]
+            _shift_shared(*chunks[0])
+            for future in futures:
+                future.result()
+
+        result = array.array("i")
+        with memory.buf[: count * itemsize] as data:
+            result.frombytes(data)
+        return result
+    finally:
+        memory.close()
+        memory.unlink()
+
+
+def _shift_shared(name, count, start, stop, sign, components):
+    # Shift ordinals in shared memory between start and stop, in place.
+    from multiprocessing import shared_memory
+
+    memory = shared_memory.SharedMemory(name=name)
+    try:
+        with memory.buf.cast("i") as values, values[start:stop] as ordinals:
+            if components is None:
+                deltas = DatedeltaArray.from_components(
+                    values[count + start : count + stop],
+                    values[2 * count + start : 2 * count + stop],
+                    values[3 * count + start : 3 * count + stop],
+                )
+                result = _shift_arrays(ordinals, deltas, sign)
+            else:
+                result = _shift_array(ordinals, *components)
+            ordinals[:] = result
+    finally:
+        memory.close()
+
+
+def _shift_index(year, month, day, years, months):
+    # Same logic as datedelta.__radd__, for batch operations, except it works
+    # on a month index, (year - 1) * 12 + month - 1, and returns the month index
+    # and the day of the result. Since all months have at least 28 days,
+    # checking day > 28 first skips most table lookups.
+    index = year * 12 + month - 13
+    if years:
+        index += years * 12
+        if day > 28 and day > _MONTH_LENGTHS[index % _CYCLE_MONTHS]:
+            index += 1
+            day = 1
+    if months:
+        index += months
+        if day > 28 and day > _MONTH_LENGTHS[index % _CYCLE_MONTHS]:
+            index += 1
+            day = 1
+    return index, day
+
+
+def _ordinal(index, day):
+    # Return the ordinal of a date given by its month index and day.
+    if not 0 <= index < _MAX_MONTH_INDEX:
+        raise ValueError(f"year {index // 12 + 1} is out of range")
+    cycles, index = divmod(index, _CYCLE_MONTHS)
+    return cycles * _CYCLE_DAYS + _MONTH_ORDINALS[index] + day - 1
+
+
+def _check_ordinal(ordinal):
+    if not 1 <= ordinal <= _MAX_ORDINAL:
+        raise OverflowError("date value out of range")
+    return ordinal
+
+
+# Streaming operations on rows of text, typically read from CSV files.
+
+_STREAM_CACHE_SIZE = 65536
+
+
+def stream_shift(rows, column, delta, *, subtract=False, chunk_size=1024):
+    """
+    Add a datedelta to ISO 8601 dates in a column of a stream of rows.
+
+    ``rows`` is an iterable of sequences of strings, such as a
+    :func:`csv.reader`. ``column`` is an index or, if it's a string, the name
+    of a column in the first row, which is a header row.
+
+    Yield rows as lists of strings, with ``date + delta`` instead of ``date``
+    in ``column``, or ``date - delta`` when ``subtract`` is true. The header
+    row and empty values are passed through unchanged. Rows that don't have
+    ``column`` raise :exc:`ValueError`.
+
+    Rows are processed by chunks of ``chunk_size``, so memory usage doesn't
+    depend on the length of the stream.
+
+    """
+    import itertools
+
+    rows = iter(rows)
+    # Keep the column as provided and number rows from 1, including the header
+    # row, for error messages.
+    name = column
+    number = 1
+    if isinstance(column, str):
+        header = next(rows, None)
+        if header is None:
+            return
+        try:
+            column = list(header).index(column)
+        except ValueError:
+            raise ValueError(f"column {column!r} not found in header") from None
+        yield list(header)
+        number += 1
+    shift = sub_array if subtract else add_array
+
+    # Values are heavily repeated in practice, so caching parsing pays off.
+    # The cache is cleared when it gets full to keep memory usage bounded.
+    ordinals = {}
+    while True:
+        chunk = [list(row) for row in itertools.islice(rows, chunk_size)]
+        if not chunk:
+            return
+        try:
+            values = [row[column] for row in chunk]
+        except IndexError:
+            position = next(
+                position
+                for position, row in enumerate(chunk)
+                if not -len(row) <= column < len(row)
+            )
+            raise ValueError(
+                f"row {number + position} has no column {name!r}"
+            ) from None
+        if len(ordinals) > _STREAM_CACHE_SIZE:
+            ordinals.clear()
+        for position, value in enumerate(values):
+            if value and value not in ordinals:
+                try:
+                    date = datetime.date.fromisoformat(value)
+                except ValueError as exc:
+                    raise ValueError(f"row {number + position}: {exc}") from None
+                ordinals[value] = date.toordinal()
+        number += len(chunk)
+        results = iter(shift([ordinals[value] for value in values if value], delta))
+        for row, value in zip(chunk, values):
+            if value:
+                row[column] = datetime.date.fromordinal(next(results)).isoformat()
+            yield row
+
+
+# Opt-in instrumentation of datedelta operations.
+
+# Operations recorded when instrumentation is enabled, by method of datedelta.
+_INSTRUMENTED = {
+    "__init__": "construct",
+    "_from_ints": "construct",
+    "intern": "intern",
+    "__add__": "add",
+    "__sub__": "sub",
+    "__mul__": "mul",
+    "__rmul__": "mul",
+    "__neg__": "neg",
+    "__radd__": "add_date",
+    "__rsub__": "sub_date",
+    "apply_many": "apply_many",
+}
+
+
+# Lock protecting the counters of instrumentation. It comes from _thread, which
+# is always loaded, unlike threading, so creating it doesn't slow down importing
+# this module.
+
+_INSTRUMENTATION_LOCK = _thread.allocate_lock()
+
+
+class _Instrumentation:
+    # There's a single instance: datedelta.instrumentation.
+
+    def __init__(self):
+        self._originals = None
+        self._callback = None
+        self._counters = {}
+        self._cache_baselines = {}
+
+    @property
+    def enabled(self):
+        """
+        Whether instrumentation is enabled.
+
+        """
+        return self._originals is not None
+
+    def enable(self, callback=None):
+        """
+        Start recording operations on datedeltas.
+
+        If ``callback`` is provided, it's called after each operation with the
+        name of the operation, the shape of the datedelta, the time spent in
+        seconds, and the number of roll-forward adjustments.
+
+        Operations are methods of :class:`datedelta`, including arithmetic and
+        :meth:`datedelta.apply_many`. ``construct`` counts all datedeltas that
+        are created, including results of arithmetic. Functions working on
+        arrays of ordinals, such as :func:`add_array`, :func:`sub_array`,
+        :func:`grid`, :func:`schedule`, and :func:`stream_shift`, and methods of
+        :class:`DatedeltaArray` and :class:`BusinessCalendar`, aren't recorded,
+        apart from the datedeltas they create. Neither are cache hits of
+        :func:`cached_add` and :func:`cached_sub`, apart from their count.
+
+        When instrumentation is disabled, which is the default, operations don't
+        pay any overhead: they aren't instrumented at all. When it's enabled,
+        they're much slower.
+
+        """
+        # Holding the lock prevents concurrent calls to enable() or disable()
+        # from saving instrumented methods as originals.
+        with _INSTRUMENTATION_LOCK:
+            self._callback = callback
+            if self._originals is not None:
+                return
+            _load_tables()
+            self._clear()
+            self._originals = {name: datedelta.__dict__[name] for name in _INSTRUMENTED}
+            for name, method in self._originals.items():
+                setattr(datedelta, name, self._wrap(name, method))
+
+    def disable(self):
+        """
+        Stop recording operations on datedeltas.
+
+        Recorded values are kept until :meth:`reset` or :meth:`enable` is called.
+
+        """
+        with _INSTRUMENTATION_LOCK:
+            if self._originals is None:
+                return
+            for name, method in self._originals.items():
+                setattr(datedelta, name, method)
+            self._originals = None
+            self._callback = None
+
+    def reset(self):
+        """
+        Clear recorded values.
+
+        """
+        with _INSTRUMENTATION_LOCK:
+            self._clear()
+
+    def snapshot(self):
+        """
+        Return recorded values as a dict.
+
+        ``operations`` maps the names of operations to the shapes of datedeltas
+        involved to a dict of ``count``, ``roll_forwards``, and ``seconds``.
+
+        ``cache_hits`` maps ``intern`` and ``shift`` to the number of hits in
+        the caches of :meth:`datedelta.intern` and :func:`cached_add`.
+
+        """
+        with _INSTRUMENTATION_LOCK:
+            operations = {
+                operation: {shape: dict(values) for shape, values in shapes.items()}
+                for operation, shapes in self._counters.items()
+            }
+            cache_hits = {}
+            for name, cache in self._current_caches():
+                baseline_cache, baseline_hits = self._cache_baselines.get(
+                    name, (None, 0)
+                )
+                hits = cache.cache_info().hits if cache else 0
+                if cache is baseline_cache:
+                    hits -= baseline_hits
+                cache_hits[name] = hits
+        return {"operations": operations, "cache_hits": cache_hits}
+
+    def _clear(self):
+        # The caller must hold _INSTRUMENTATION_LOCK.
+        self._counters = {}
+        self._cache_baselines = {
+            name: (cache, cache.cache_info().hits if cache else 0)
+            for name, cache in self._current_caches()
+        }
+
+    def _current_caches(self):
+        return [("intern", _intern), ("shift", _shift_cached)]
+
+    def _record(self, operation, delta, seconds, roll_forwards):
+        shape = _shape(delta)
+        with _INSTRUMENTATION_LOCK:
+            shapes = self._counters.setdefault(operation, {})
+            values = shapes.get(shape)
+            if values is None:
+                values = shapes[shape] = {
+                    "count": 0,
+                    "roll_forwards": 0,
+                    "seconds": 0.0,
+                }
+            values["count"] += 1
+            values["roll_forwards"] += roll_forwards
+            values["seconds"] += seconds
+        callback = self._callback
+        if callback is not None:
+            callback(operation, shape, seconds, roll_forwards)
+
+    def _wrap(self, name, method):
+        import functools
+        import time
+
+        operation = _INSTRUMENTED[name]
+        perf_counter = time.perf_counter
+        record = self._record
+
+        if name in ("intern", "_from_ints"):
+            # Record the shape of the result rather than the class.
+            method = method.__func__
+
+            def wrapper(cls, *args, **kwargs):
+                start = perf_counter()
+                result = method(cls, *args, **kwargs)
+                elapsed = perf_counter() - start
+                # _from_ints() creates subclasses with __init__, which records
+                # their construction.
+                if name == "intern" or cls is datedelta:
+                    record(operation, result, elapsed, 0)
+                return result
+
+            return classmethod(functools.update_wrapper(wrapper, method))
+
+        if name in ("__radd__", "__rsub__"):
+            sign = 1 if name == "__radd__" else -1
+
+            def wrapper(self, other):
+                start = perf_counter()
+                result = method(self, other)
+                elapsed = perf_counter() - start
+                if result is not NotImplemented:
+                    rolls_forward = _rolls_forward(
+                        other, sign * self._years, sign * self._months
+                    )
+                    record(operation, self, elapsed, int(rolls_forward))
+                return result
+
+        elif name == "apply_many":
+
+            def wrapper(self, dates, *, subtract=False):
+                dates = list(dates)
+                start = perf_counter()
+                result = method(self, dates, subtract=subtract)
+                elapsed = perf_counter() - start
+                sign = -1 if subtract else 1
+                # Subclasses such as datetime.datetime are recorded separately
+                # because apply_many() adds or subtracts them with operators.
+                roll_forwards = sum(
+                    _rolls_forward(other, sign * self._years, sign * self._months)
+                    for other in dates
+                    if type(other) is datetime.date
+                )
+                record(operation, self, elapsed, roll_forwards)
+                return result
+
+        else:
+
+            def wrapper(self, *args, **kwargs):
+                start = perf_counter()
+                result = method(self, *args, **kwargs)
+                elapsed = perf_counter() - start
+                if result is not NotImplemented:
+                    record(operation, self, elapsed, 0)
+                return result
+
+        return functools.update_wrapper(wrapper, method)
+
+
+def _shape(delta):
+    # Describe which components of a datedelta are set e.g. "years+days".
+    names = []
+    if delta._years:
+        names.append("years")
+    if delta._months:
+        names.append("months")
+    if delta._days:
+        names.append("days")
+    return "+".join(names) or "zero"
+
+
+def _rolls_forward(date, years, months):
+    # Tell whether adding years then months to date rolls forward to the first
+    # day of the next month, like datedelta.__radd__ does for missing days.
+    day = date.day
+    return (
+        day > 28 and _shift_index(date.year, date.month, day, years, months)[1] != day
+    )
+
+
+instrumentation = _Instrumentation()
+
 
 # Public constants for convenience.
 
@@ -239,6 +2135,8 @@ DAY = datedelta(days=1)
 
 # There's a private implementation of the same logic in the datetime module.
 
+_MAX_ORDINAL = datetime.date.max.toordinal()
+
 _DAYS_IN_MONTH = [None, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
 
 
@@ -250,5 +2148,110 @@ def _days_in_month(year, month):
     return _DAYS_IN_MONTH[month]
 
 
+# Month lengths and ordinals of the first day of months, indexed by
+# (year - 1) * 12 + month - 1, for the first 400 years of the Gregorian calendar.
+# Since 400 years contain exactly 146097 days, they're valid modulo 4800 months.
+# They're built on first use by _load_tables() because that takes about 0.5ms.
+
+_CYCLE_MONTHS = 4800
+
+_CYCLE_DAYS = 146097
+
+_MAX_MONTH_INDEX = 9999 * 12
+
+_MONTH_LENGTHS = None
+
+_MONTH_ORDINALS = None
+
+
+def _load_tables():
+    global _MONTH_LENGTHS, _MONTH_ORDINALS
+    if _MONTH_ORDINALS is not None:
+        return
+
+    import array
+    import itertools
+
+    _MONTH_LENGTHS = b"".join(
+        bytes([31, _days_in_month(year, 2), 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+        for year in range(1, 401)
+    )
+    _MONTH_ORDINALS = array.array("i", itertools.accumulate(_MONTH_LENGTHS, initial=1))
+
+
 def _s(value):
     return "" if abs(value) == 1 else "s"
+
+
+def _main(argv=None):
+    # Command line interface: python -m datedelta shift ...
+    import argparse
+    import contextlib
+    import csv
+    import time
+
+    parser = argparse.ArgumentParser(prog="python -m datedelta")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    shift_parser = subparsers.add_parser(
+        "shift",
+        help="add a datedelta to a column of dates in a CSV file",
+    )
+    shift_parser.add_argument("column", help="name of the column of dates")
+    shift_parser.add_argument(
+        "delta",
+        type=datedelta.fromisoformat,
+        help="ISO 8601 duration e.g. P1Y",
+    )
+    shift_parser.add_argument(
+        "input",
+        nargs="?",
+        default="-",
+        help="input CSV file (default: stdin)",
+    )
+    shift_parser.add_argument(
+        "output",
+        nargs="?",
+        default="-",
+        help="output CSV file (default: stdout)",
+    )
+    shift_parser.add_argument(
+        "--subtract",
+        action="store_true",
+        help="subtract the datedelta instead of adding it",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        with contextlib.ExitStack() as stack:
+            if args.input == "-":
+                input_file = sys.stdin
+            else:
+                input_file = stack.enter_context(open(args.input, newline=""))
+            if args.output == "-":
+                output_file = sys.stdout
+            else:
+                output_file = stack.enter_context(open(args.output, "w", newline=""))
+            start = time.perf_counter()
+            # Numbering rows from 0 excludes the header row from the count.
+            count = 0
+            writer = csv.writer(output_file)
+            for count, row in enumerate(
+                stream_shift(
+                    csv.reader(input_file),
+                    args.column,
+                    args.delta,
+                    subtract=args.subtract,
+                )
+            ):
+                writer.writerow(row)
+            elapsed = time.perf_counter() - start
+    except (OSError, OverflowError, ValueError) as exc:
+        parser.exit(1, f"error: {exc}\n")
+    print(
+        f"{count} rows in {elapsed:.3f}s ({count / elapsed:.0f} rows/sec)",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":  # pragma: no cover
+    _main()
@@ -1,12 +1,50 @@
 # For convenience and readability in tests, use short aliases.
 
+import array
+import concurrent.futures
+import io
+import itertools
+import os
 import pickle
+import subprocess
+import sys
+import threading
 from datetime import date as d
+from datetime import datetime as dt
 from datetime import timedelta as td
+from datetime import timezone as tz
 
 import pytest
+import datedelta
 from datedelta import datedelta as dd
-from datedelta import DAY, MONTH, WEEK, YEAR
+from datedelta import (
+    BusinessCalendar,
+    DAY,
+    DatedeltaArray,
+    MONTH,
+    WEEK,
+    YEAR,
+    Recurrence,
+    add_array,
+    between_array,
+    cached_add,
+    cached_sub,
+    decode_many,
+    encode_many,
+    grid,
+    instrumentation,
+    intern_cache_info,
+    next_occurrences,
+    parse_many,
+    periods_between,
+    periods_between_array,
+    schedule,
+    set_intern_cache_size,
+    set_shift_cache_size,
+    shift_cache_info,
+    stream_shift,
+    sub_array,
+)
 
 
 @pytest.mark.parametrize(
@@ -204,6 +242,66 @@ def test_equal_not_equal_and_hash(delta_1, delta_2, is_equal):
         assert (hash(delta_1) == hash(delta_2)) == is_equal
 
 
+# Sorted in increasing order.
+ORDERED_DELTAS = [
+    dd(years=-1),
+    dd(months=-1, days=-1),
+    dd(months=-1),
+    dd(days=-31),
+    dd(),
+    dd(days=1),
+    dd(days=31),
+    dd(months=1, days=-1),
+    dd(months=1),
+    dd(months=12),
+    dd(years=1),
+    dd(years=1, days=1),
+    dd(months=13),
+    dd(years=1, months=1),
+]
+
+
+@pytest.mark.parametrize("index_1", range(len(ORDERED_DELTAS)))
+@pytest.mark.parametrize("index_2", range(len(ORDERED_DELTAS)))
+def test_ordering(index_1, index_2):
+    delta_1, delta_2 = ORDERED_DELTAS[index_1], ORDERED_DELTAS[index_2]
+    assert (delta_1 < delta_2) == (index_1 < index_2)
+    assert (delta_1 <= delta_2) == (index_1 <= index_2)
+    assert (delta_1 > delta_2) == (index_1 > index_2)
+    assert (delta_1 >= delta_2) == (index_1 >= index_2)
+    assert (delta_1.sort_key < delta_2.sort_key) == (index_1 < index_2)
+
+
+def test_sorted():
+    assert sorted(reversed(ORDERED_DELTAS)) == ORDERED_DELTAS
+
+
+@pytest.mark.parametrize("other", [None, 0, "a", td(days=1)])
+def test_ordering_unsupported_type(other):
+    with pytest.raises(TypeError):
+        dd() < other
+    with pytest.raises(TypeError):
+        dd() <= other
+    with pytest.raises(TypeError):
+        dd() > other
+    with pytest.raises(TypeError):
+        dd() >= other
+
+
+@pytest.mark.parametrize(
+    ("delta", "total_months", "sort_key"),
+    [
+        (dd(), 0, (0, 0, 0)),
+        (dd(years=2, months=3, days=6), 27, (27, 6, 2)),
+        (dd(years=1, months=-1), 11, (11, 0, 1)),
+        (dd(years=-2, months=-3, days=-6), -27, (-27, -6, -2)),
+    ],
+)
+def test_total_months_and_sort_key(delta, total_months, sort_key):
+    assert delta.total_months == total_months
+    assert delta.sort_key == sort_key
+
+
 @pytest.mark.parametrize(
     ("delta"),
     [
@@ -390,6 +488,48 @@ def test_multiply_integer(delta_1, count, delta):
     assert count * delta_1 == delta
 
 
+class DatedeltaSubclass(dd):
+    pass
+
+
+@pytest.mark.parametrize(
+    "operation",
+    [
+        lambda delta: delta + YEAR,
+        lambda delta: delta - dd(months=-1),
+        lambda delta: delta * 2,
+        lambda delta: -delta,
+    ],
+)
+def test_arithmetic_preserves_subclass(operation):
+    delta = operation(DatedeltaSubclass(years=1, months=1, days=1))
+    assert type(delta) is DatedeltaSubclass
+    assert type(delta.years) is type(delta.months) is type(delta.days) is int
+
+
+class PositiveDatedelta(dd):
+    def __init__(self, *, years=0, months=0, days=0):
+        if years < 0 or months < 0 or days < 0:
+            raise ValueError("datedelta must be positive")
+        super().__init__(years=years, months=months, days=days)
+
+
+@pytest.mark.parametrize(
+    "operation",
+    [
+        lambda delta: delta - YEAR,
+        lambda delta: delta * -1,
+        lambda delta: -delta,
+        lambda delta: PositiveDatedelta.from_bytes(dd(days=-1).to_bytes()),
+    ],
+)
+def test_arithmetic_calls_subclass_init(operation):
+    with pytest.raises(ValueError) as exc:
+        operation(PositiveDatedelta(days=1))
+
+    assert "datedelta must be positive" in str(exc.value)
+
+
 @pytest.mark.parametrize(
     ("date_1", "delta", "date_2"),
     [
@@ -561,3 +701,1572 @@ def test_multiply_unsupported_type(delta, other):
         delta * other
     with pytest.raises(TypeError):
         other * delta
+
+
+BATCH_DATES = [
+    d(2020, 1, 1),
+    d(2020, 1, 31),
+    d(2020, 2, 28),
+    d(2020, 2, 29),
+    d(2020, 3, 1),
+    d(2020, 3, 31),
+    d(2020, 12, 31),
+    d(2021, 2, 28),
+    d(2021, 3, 1),
+]
+
+
+BATCH_DELTAS = [
+    dd(),
+    dd(years=1),
+    dd(years=-1),
+    dd(years=4),
+    dd(months=1),
+    dd(months=-1),
+    dd(months=13),
+    dd(days=1),
+    dd(days=-365),
+    dd(years=1, months=1, days=1),
+    dd(years=1, days=-10),
+    dd(years=-2, months=6),
+]
+
+
+@pytest.mark.parametrize("delta", BATCH_DELTAS)
+def test_add_array(delta):
+    ordinals = [date.toordinal() for date in BATCH_DATES]
+    assert list(add_array(ordinals, delta)) == [
+        (date + delta).toordinal() for date in BATCH_DATES
+    ]
+
+
+@pytest.mark.parametrize("delta", BATCH_DELTAS)
+def test_add_array_consecutive_dates(delta):
+    # Consecutive dates share computations within each month.
+    dates = [d(2019, 12, 1) + td(days=n) for n in range(800)]
+    ordinals = [date.toordinal() for date in dates]
+    assert list(add_array(ordinals, delta)) == [
+        (date + delta).toordinal() for date in dates
+    ]
+    assert list(add_array(ordinals[::-1], delta)) == [
+        (date + delta).toordinal() for date in dates[::-1]
+    ]
+
+
+@pytest.mark.parametrize("delta", BATCH_DELTAS)
+def test_sub_array(delta):
+    ordinals = [date.toordinal() for date in BATCH_DATES]
+    assert list(sub_array(ordinals, delta)) == [
+        (date - delta).toordinal() for date in BATCH_DATES
+    ]
+
+
+@pytest.mark.parametrize(
+    ("date", "delta"),
+    [
+        (d.max, dd(days=1)),
+        (d.min, dd(days=-1)),
+        (d(9999, 11, 30), dd(months=1, days=2)),
+        (d(1, 2, 1), dd(months=-1, days=-1)),
+    ],
+)
+def test_add_array_overflow(date, delta):
+    with pytest.raises(OverflowError):
+        date + delta
+    with pytest.raises(OverflowError):
+        add_array([date.toordinal()], delta)
+
+
+@pytest.mark.parametrize(
+    ("date", "delta"),
+    [
+        (d.max, dd(years=1)),
+        (d.min, dd(months=-1)),
+    ],
+)
+def test_add_array_out_of_range(date, delta):
+    with pytest.raises(ValueError):
+        date + delta
+    with pytest.raises(ValueError):
+        add_array([date.toordinal()], delta)
+
+
+@pytest.mark.parametrize("delta", BATCH_DELTAS)
+def test_apply_many(delta):
+    assert delta.apply_many(BATCH_DATES) == [date + delta for date in BATCH_DATES]
+
+
+@pytest.mark.parametrize("delta", BATCH_DELTAS)
+def test_apply_many_subtract(delta):
+    assert delta.apply_many(BATCH_DATES, subtract=True) == [
+        date - delta for date in BATCH_DATES
+    ]
+
+
+@pytest.mark.parametrize(
+    ("date", "delta"),
+    [
+        (d.max, dd(days=1)),
+        (d(9999, 11, 30), dd(months=1, days=2)),
+        (d(1, 2, 1), dd(months=-1, days=-1)),
+    ],
+)
+def test_apply_many_overflow(date, delta):
+    with pytest.raises(OverflowError):
+        date + delta
+    with pytest.raises(OverflowError):
+        delta.apply_many([date])
+
+
+@pytest.mark.parametrize("subtract", [False, True])
+def test_apply_many_datetime(subtract):
+    datetimes = [dt(2020, 2, 29, 12, 30), dt(2020, 3, 31, 23, 59)]
+    delta = dd(years=1, months=1, days=1)
+    assert delta.apply_many(datetimes, subtract=subtract) == [
+        datetime - delta if subtract else datetime + delta for datetime in datetimes
+    ]
+
+
+@pytest.mark.parametrize("delta", BATCH_DELTAS)
+def test_schedule(delta):
+    for date in BATCH_DATES:
+        assert list(schedule(date, delta, 30)) == [date + n * delta for n in range(30)]
+
+
+@pytest.mark.parametrize("delta", [dd(months=1), dd(months=1, days=1)])
+def test_schedule_datetime(delta):
+    datetime = dt(2020, 1, 31, 12, 30)
+    assert list(schedule(datetime, delta, 3)) == [
+        datetime + n * delta for n in range(3)
+    ]
+
+
+def test_schedule_empty():
+    assert list(schedule(d(2020, 1, 1), MONTH, 0)) == []
+
+
+@pytest.mark.parametrize(
+    ("date", "delta"),
+    [
+        (d(1, 1, 31), dd(months=1)),
+        (d(1, 2, 28), dd(years=3)),
+        (d(1, 2, 28), dd(years=399)),
+        (d(4, 2, 29), dd(years=396)),
+        (d(1900, 1, 29), dd(months=1)),
+        (d(2000, 1, 29), dd(months=1)),
+        (d(2000, 2, 29), dd(years=100)),
+        (d(2000, 2, 29), dd(years=400)),
+        (d(9999, 12, 31), dd(years=-9998)),
+        (d(9999, 6, 30), dd(years=1, months=-12)),
+        (d(1, 6, 30), dd(years=-1, months=12)),
+    ],
+)
+def test_add_array_calendar_range(date, delta):
+    assert list(add_array([date.toordinal()], delta)) == [(date + delta).toordinal()]
+
+
+# Include dates close to the boundaries of 400-year cycles.
+GRID_DATES = BATCH_DATES + [d(400, 12, 15), d(400, 12, 31), d(401, 1, 1)]
+
+
+@pytest.mark.parametrize("deltas", [BATCH_DELTAS, DatedeltaArray(BATCH_DELTAS)])
+def test_grid(deltas):
+    ordinals = [date.toordinal() for date in GRID_DATES]
+    rows = grid(ordinals, deltas)
+    assert all(type(row) is array.array for row in rows)
+    assert [list(row) for row in rows] == [
+        [(date + delta).toordinal() for delta in BATCH_DELTAS] for date in GRID_DATES
+    ]
+
+
+def test_grid_empty():
+    assert grid([], BATCH_DELTAS) == []
+    assert grid([1, 2], []) == [array.array("i"), array.array("i")]
+
+
+@pytest.mark.parametrize(
+    ("date", "delta"),
+    [
+        (d.max, dd(days=1)),
+        (d(9999, 12, 1), dd(days=31)),
+        (d.min, dd(days=-1)),
+        (d(9996, 2, 29), dd(days=10_000)),
+    ],
+)
+def test_grid_overflow(date, delta):
+    with pytest.raises(OverflowError):
+        date + delta
+    with pytest.raises(OverflowError):
+        grid([date.toordinal()], [delta])
+
+
+@pytest.mark.parametrize(
+    ("date", "delta"),
+    [
+        (d(9999, 12, 15), dd(months=1)),
+        (d.min, dd(months=-1)),
+    ],
+)
+def test_grid_out_of_range(date, delta):
+    with pytest.raises(ValueError):
+        date + delta
+    with pytest.raises(ValueError):
+        grid([date.toordinal()], [delta])
+
+
+@pytest.fixture
+def intern_cache():
+    set_intern_cache_size(2)
+    yield
+    set_intern_cache_size(1024)
+
+
+def test_intern(intern_cache):
+    delta = dd.intern(years=1, months=2, days=3)
+    assert delta == dd(years=1, months=2, days=3)
+    assert hash(delta) == hash(dd(years=1, months=2, days=3))
+    assert dd.intern(years=1, months=2, days=3) is delta
+
+
+def test_intern_evicts_least_recently_used(intern_cache):
+    delta = dd.intern(years=1)
+    dd.intern(months=1)
+    dd.intern(years=1)
+    dd.intern(days=1)
+    assert dd.intern(years=1) is delta
+    assert intern_cache_info() == (2, 3, 2, 2)
+
+
+def test_intern_must_be_integer(intern_cache):
+    with pytest.raises(ValueError) as exc:
+        dd.intern(years=4.5)
+
+    assert "years must be an integer value" in str(exc.value)
+    assert intern_cache_info().currsize == 0
+
+
+@pytest.fixture
+def shift_cache():
+    set_shift_cache_size(2)
+    yield
+    set_shift_cache_size(4096)
+
+
+@pytest.mark.parametrize("delta", BATCH_DELTAS)
+def test_cached_add_and_sub(shift_cache, delta):
+    for date in BATCH_DATES:
+        for _ in range(2):
+            assert cached_add(date, delta) == date + delta
+            assert cached_sub(date, delta) == date - delta
+
+
+def test_cached_add_and_sub_datetime(shift_cache):
+    datetime = dt(2020, 1, 31, 12, 30)
+    assert cached_add(datetime, MONTH) == dt(2020, 3, 1, 12, 30)
+    assert cached_sub(datetime, MONTH) == dt(2019, 12, 31, 12, 30)
+    assert shift_cache_info().currsize == 0
+
+
+def test_shift_cache_info(shift_cache):
+    cached_add(d(2020, 1, 31), MONTH)
+    cached_sub(d(2020, 3, 31), MONTH)
+    cached_add(d(2020, 1, 31), MONTH)
+    cached_add(d(2020, 3, 31), dd(months=-1))
+    assert shift_cache_info() == (2, 2, 2, 2)
+    cached_add(d(2020, 1, 1), MONTH)
+    assert shift_cache_info() == (2, 3, 2, 2)
+
+
+PERIODS_DELTAS = [
+    dd(days=1),
+    dd(days=7),
+    dd(months=1),
+    dd(months=3),
+    dd(years=1),
+    dd(years=1, months=6),
+    dd(months=1, days=1),
+    dd(years=1, days=10),
+]
+
+
+def periods_between_loop(start, end, delta):
+    n = 0
+    while start + (n + 1) * delta <= end:
+        n += 1
+    return n, start + n * delta
+
+
+@pytest.mark.parametrize("delta", PERIODS_DELTAS)
+def test_periods_between(delta):
+    for start in BATCH_DATES:
+        for end in BATCH_DATES + [d(2024, 2, 29), d(2030, 1, 31)]:
+            if end >= start:
+                assert periods_between(start, end, delta) == periods_between_loop(
+                    start, end, delta
+                )
+
+
+@pytest.mark.parametrize(
+    ("start", "end", "delta", "expected"),
+    [
+        (d(9999, 1, 1), d.max, YEAR, (0, d(9999, 1, 1))),
+        (d(9999, 12, 1), d.max, MONTH, (0, d(9999, 12, 1))),
+        (d(9999, 11, 1), d.max, MONTH, (1, d(9999, 12, 1))),
+        (d(9999, 11, 30), d.max, dd(months=1, days=1), (1, d.max)),
+        (d(9999, 12, 1), d.max, dd(months=1, days=1), (0, d(9999, 12, 1))),
+        (d(9998, 3, 2), d.max, dd(months=1, days=3), (19, d(9999, 11, 28))),
+        (d.max, d.max, DAY, (0, d.max)),
+        (dt(9999, 12, 30, 12), dt.max, DAY, (1, dt(9999, 12, 31, 12))),
+    ],
+)
+def test_periods_between_end_of_calendar(start, end, delta, expected):
+    assert periods_between(start, end, delta) == expected
+
+
+@pytest.mark.parametrize("delta", PERIODS_DELTAS + [dd(months=1, days=3)])
+def test_periods_between_array(delta):
+    dates = BATCH_DATES + [d(2030, 1, 31), d(9998, 3, 2), d(9999, 12, 1), d.max]
+    pairs = [(start, end) for start in dates for end in dates if start <= end]
+    counts, ordinals = periods_between_array(
+        [start.toordinal() for start, _ in pairs],
+        [end.toordinal() for _, end in pairs],
+        delta,
+    )
+    assert [(n, d.fromordinal(ordinal)) for n, ordinal in zip(counts, ordinals)] == [
+        periods_between(start, end, delta) for start, end in pairs
+    ]
+
+
+@pytest.mark.parametrize("delta", [DAY, MONTH])
+def test_periods_between_array_end_must_not_be_before_start(delta):
+    with pytest.raises(ValueError) as exc:
+        periods_between_array([1, 3], [2, 2], delta)
+
+    assert "end must not be before start" in str(exc.value)
+
+
+def test_periods_between_array_must_have_same_length():
+    with pytest.raises(ValueError) as exc:
+        periods_between_array([1, 2], [1], MONTH)
+
+    assert "start and end ordinals must have the same length" in str(exc.value)
+
+
+def test_periods_between_array_delta_must_be_positive():
+    with pytest.raises(ValueError) as exc:
+        periods_between_array([1], [2], dd(months=-1))
+
+    assert "delta must be positive" in str(exc.value)
+
+
+def test_periods_between_datetime():
+    start = dt(2020, 1, 31, 12, 30)
+    assert periods_between(start, dt(2020, 3, 1, 12, 29), MONTH) == (0, start)
+    assert periods_between(start, dt(2020, 3, 1, 12, 30), MONTH) == (
+        1,
+        dt(2020, 3, 1, 12, 30),
+    )
+
+
+@pytest.mark.parametrize("delta", [dd(), dd(months=-1), dd(years=1, days=-1)])
+def test_periods_between_delta_must_be_positive(delta):
+    with pytest.raises(ValueError) as exc:
+        periods_between(d(2020, 1, 1), d(2021, 1, 1), delta)
+
+    assert "delta must be positive" in str(exc.value)
+
+
+def test_periods_between_end_must_not_be_before_start():
+    with pytest.raises(ValueError) as exc:
+        periods_between(d(2021, 1, 1), d(2020, 1, 1), MONTH)
+
+    assert "end must not be before start" in str(exc.value)
+
+
+@pytest.mark.parametrize(
+    ("start", "end", "delta"),
+    [
+        (d(2020, 1, 1), d(2020, 1, 1), dd()),
+        (d(2020, 1, 1), d(2020, 1, 31), dd(days=30)),
+        (d(2020, 1, 1), d(2020, 2, 1), dd(months=1)),
+        (d(2020, 1, 31), d(2020, 2, 29), dd(days=29)),
+        (d(2020, 1, 31), d(2020, 3, 1), dd(months=1)),
+        (d(2020, 1, 31), d(2020, 3, 31), dd(months=2)),
+        (d(2020, 1, 15), d(2021, 3, 20), dd(years=1, months=2, days=5)),
+        (d(2020, 2, 29), d(2021, 3, 1), dd(years=1)),
+        (d(2020, 2, 29), d(2021, 8, 29), dd(months=18)),
+        (d(2020, 2, 29), d(2024, 2, 29), dd(years=4)),
+        (d(2020, 1, 31), d(2020, 1, 1), dd(days=-30)),
+        (d(2020, 3, 1), d(2020, 2, 1), dd(months=-1)),
+        (d(2020, 5, 31), d(2020, 3, 1), dd(months=-3)),
+        (d(2021, 3, 20), d(2020, 1, 15), dd(years=-1, months=-2, days=-5)),
+        (d(2021, 3, 1), d(2020, 2, 29), dd(years=-1, days=-1)),
+        (dt(2020, 1, 31, 12), dt(2020, 3, 1, 12), dd(months=1)),
+        (d.min, d.min, dd()),
+        (d.max, d.max, dd()),
+        (d.min, d.max, dd(years=9998, months=11, days=30)),
+        (d.max, d.min, dd(years=-9998, months=-11, days=-30)),
+        (d(1, 1, 31), d(1, 1, 1), dd(days=-30)),
+        (d(1, 3, 31), d.min, dd(months=-2, days=-30)),
+        (d(9999, 12, 1), d.max, dd(days=30)),
+        (d(9999, 10, 31), d.max, dd(months=2)),
+        (d(9996, 2, 29), d.max, dd(months=46, days=2)),
+    ],
+)
+def test_between(start, end, delta):
+    assert dd.between(start, end) == delta
+    assert start + delta == end
+
+
+@pytest.mark.parametrize("first", [d.min, d.max - td(days=80)])
+def test_between_calendar_boundaries(first):
+    dates = [first + td(days=n) for n in range(81)]
+    for start, end in itertools.product(dates, dates):
+        assert start + dd.between(start, end) == end
+
+
+def test_between_array():
+    dates = BATCH_DATES + [d.min, d(1, 1, 31), d(9996, 2, 29), d(9999, 12, 1), d.max]
+    pairs = list(itertools.product(dates, dates))
+    deltas = between_array(
+        [start.toordinal() for start, _ in pairs],
+        [end.toordinal() for _, end in pairs],
+    )
+    assert list(deltas) == [dd.between(start, end) for start, end in pairs]
+
+
+def test_between_array_must_have_same_length():
+    with pytest.raises(ValueError) as exc:
+        between_array([1, 2], [1])
+
+    assert "start and end ordinals must have the same length" in str(exc.value)
+
+
+def test_between_datetimes_with_different_times():
+    with pytest.raises(ValueError) as exc:
+        dd.between(dt(2020, 1, 1, 12), dt(2020, 2, 1, 13))
+
+    assert "there's no datedelta from start to end" in str(exc.value)
+
+
+ARRAY_DELTAS = [dd(), dd(years=2), dd(months=-3, days=6), dd(years=1, months=1, days=1)]
+
+
+def test_datedelta_array():
+    deltas = DatedeltaArray(ARRAY_DELTAS)
+    assert len(deltas) == 4
+    assert list(deltas) == ARRAY_DELTAS
+    assert deltas[2] == dd(months=-3, days=6)
+    assert deltas[-1] == dd(years=1, months=1, days=1)
+    assert deltas[1:3] == DatedeltaArray(ARRAY_DELTAS[1:3])
+
+
+def test_datedelta_array_repr():
+    assert repr(DatedeltaArray([dd(years=2), dd(days=-1)])) == (
+        "datedelta.DatedeltaArray("
+        "[datedelta.datedelta(years=2), datedelta.datedelta(days=-1)])"
+    )
+
+
+def test_datedelta_array_components():
+    deltas = DatedeltaArray(ARRAY_DELTAS)
+    assert deltas.years.tolist() == [0, 2, 0, 1]
+    assert deltas.months.tolist() == [0, 0, -3, 1]
+    assert deltas.days.tolist() == [0, 0, 6, 1]
+    with pytest.raises(TypeError):
+        deltas.years[0] = 1
+    assert (
+        DatedeltaArray.from_components(deltas.years, deltas.months, deltas.days)
+        == deltas
+    )
+
+
+def test_datedelta_array_components_must_have_same_length():
+    with pytest.raises(ValueError) as exc:
+        DatedeltaArray.from_components([1, 2], [3, 4], [5])
+
+    assert "years, months, and days must have the same length" in str(exc.value)
+
+
+def test_datedelta_array_equal_not_equal():
+    assert DatedeltaArray(ARRAY_DELTAS) == DatedeltaArray(ARRAY_DELTAS)
+    assert DatedeltaArray(ARRAY_DELTAS) != DatedeltaArray(ARRAY_DELTAS[1:])
+    assert DatedeltaArray(ARRAY_DELTAS) != ARRAY_DELTAS
+
+
+def test_datedelta_array_is_unhashable():
+    with pytest.raises(TypeError):
+        hash(DatedeltaArray())
+
+
+def test_datedelta_array_arithmetic():
+    deltas = DatedeltaArray(ARRAY_DELTAS)
+    others = DatedeltaArray([dd(days=1), dd(years=1), dd(months=-1), dd(days=2)])
+    assert list(deltas + others) == [
+        delta + other for delta, other in zip(deltas, others)
+    ]
+    assert list(deltas - -others) == [
+        delta - -other for delta, other in zip(deltas, others)
+    ]
+    assert list(deltas + DAY) == [delta + DAY for delta in deltas]
+    assert list(DAY + deltas) == [DAY + delta for delta in deltas]
+    assert list(deltas - -DAY) == [delta - -DAY for delta in deltas]
+    assert list(-DAY - deltas) == [-DAY - delta for delta in deltas]
+    assert list(deltas * 3) == [delta * 3 for delta in deltas]
+    assert list(3 * deltas) == [3 * delta for delta in deltas]
+    assert list(-deltas) == [-delta for delta in deltas]
+    assert +deltas == deltas
+
+
+def test_datedelta_array_add_unsupported():
+    with pytest.raises(ValueError) as exc:
+        DatedeltaArray(ARRAY_DELTAS) + dd(months=1)
+
+    assert "cannot add datedeltas with opposite signs" in str(exc.value)
+
+
+def test_datedelta_array_subtract_unsupported():
+    with pytest.raises(ValueError) as exc:
+        DatedeltaArray(ARRAY_DELTAS) - dd(days=1)
+
+    assert "cannot subtract datedeltas with same signs" in str(exc.value)
+
+
+def test_datedelta_array_arrays_must_have_same_length():
+    with pytest.raises(ValueError) as exc:
+        DatedeltaArray(ARRAY_DELTAS) + DatedeltaArray(ARRAY_DELTAS[1:])
+
+    assert "arrays must have the same length" in str(exc.value)
+
+
+@pytest.mark.parametrize("other", [None, 0, "a", []])
+def test_datedelta_array_unsupported_type(other):
+    deltas = DatedeltaArray(ARRAY_DELTAS)
+    with pytest.raises(TypeError):
+        deltas + other
+    with pytest.raises(TypeError):
+        other - deltas
+    with pytest.raises(TypeError):
+        deltas * 1.5
+
+
+def test_add_and_sub_datedelta_array():
+    deltas = DatedeltaArray(BATCH_DELTAS)
+    dates = BATCH_DATES + BATCH_DATES[: len(BATCH_DELTAS) - len(BATCH_DATES)]
+    ordinals = [date.toordinal() for date in dates]
+    assert list(add_array(ordinals, deltas)) == [
+        (date + delta).toordinal() for date, delta in zip(dates, deltas)
+    ]
+    assert list(sub_array(ordinals, deltas)) == [
+        (date - delta).toordinal() for date, delta in zip(dates, deltas)
+    ]
+
+
+def test_add_datedelta_array_must_have_same_length():
+    with pytest.raises(ValueError) as exc:
+        add_array([1, 2], DatedeltaArray([DAY]))
+
+    assert "ordinals and deltas must have the same length" in str(exc.value)
+
+
+@pytest.mark.parametrize(
+    ("delta", "isoformat"),
+    [
+        (dd(), "P0D"),
+        (dd(years=1), "P1Y"),
+        (dd(months=2), "P2M"),
+        (dd(days=10), "P10D"),
+        (dd(years=1, months=2, days=10), "P1Y2M10D"),
+        (dd(years=-1), "-P1Y"),
+        (dd(years=-1, months=-2, days=-10), "-P1Y2M10D"),
+        (dd(months=-2, days=-10), "-P2M10D"),
+        (dd(years=1, days=-1), "P1Y-1D"),
+        (dd(years=-1, months=2), "P-1Y2M"),
+    ],
+)
+def test_isoformat_and_fromisoformat(delta, isoformat):
+    assert delta.isoformat() == isoformat
+    assert dd.fromisoformat(isoformat) == delta
+
+
+@pytest.mark.parametrize(
+    ("isoformat", "delta"),
+    [
+        ("P0Y", dd()),
+        ("P2W", dd(days=14)),
+        ("P1W3D", dd(days=10)),
+        ("P+1Y", dd(years=1)),
+        ("-P1Y-1D", dd(years=-1, days=1)),
+        ("P0010D", dd(days=10)),
+    ],
+)
+def test_fromisoformat(isoformat, delta):
+    assert dd.fromisoformat(isoformat) == delta
+
+
+@pytest.mark.parametrize(
+    "isoformat",
+    [
+        "",
+        "P",
+        "-P",
+        "1Y",
+        "p1y",
+        "P1",
+        "PY",
+        "P-Y",
+        "P1M1Y",
+        "P1D1W",
+        "P1Y1Y",
+        "PT1H",
+        "P1DT1H",
+        "PT1M",
+        "P 1Y",
+        "P1_0Y",
+        "P\u00b2Y",
+        "--P1Y",
+    ],
+)
+def test_fromisoformat_invalid(isoformat):
+    with pytest.raises(ValueError) as exc:
+        dd.fromisoformat(isoformat)
+
+    assert "invalid ISO 8601 duration" in str(exc.value)
+
+
+@pytest.mark.parametrize(
+    ("isoformat", "message"),
+    [
+        ("P1.5Y", "years must be an integer value"),
+        ("P1,5M", "months must be an integer value"),
+        ("P1.5W", "days must be an integer value"),
+        ("P1.5D", "days must be an integer value"),
+    ],
+)
+def test_fromisoformat_fractional(isoformat, message):
+    with pytest.raises(ValueError) as exc:
+        dd.fromisoformat(isoformat)
+
+    assert message in str(exc.value)
+
+
+def test_parse_many():
+    deltas = parse_many(["P1M", "P1Y", "P1M"])
+    assert deltas == [MONTH, YEAR, MONTH]
+    assert deltas[0] is deltas[2]
+
+
+@pytest.mark.parametrize(
+    "delta",
+    [
+        dd(),
+        dd(years=2),
+        dd(months=-3, days=6),
+        dd(years=2**31 - 1, months=-(2**31), days=1),
+    ],
+)
+def test_to_bytes_and_from_bytes(delta):
+    data = delta.to_bytes()
+    assert len(data) == 12
+    assert dd.from_bytes(data) == delta
+
+
+def test_to_bytes_format():
+    assert dd(years=1, months=-1, days=256).to_bytes() == (
+        b"\x01\x00\x00\x00\xff\xff\xff\xff\x00\x01\x00\x00"
+    )
+
+
+def test_to_bytes_overflow():
+    with pytest.raises(OverflowError):
+        dd(years=2**31).to_bytes()
+
+
+def test_to_bytes_and_from_bytes_errors_on_first_use(monkeypatch):
+    monkeypatch.setattr(datedelta, "_STRUCT", None)
+    monkeypatch.setattr(datedelta, "_STRUCT_ERROR", None)
+    with pytest.raises(OverflowError):
+        dd(years=2**31).to_bytes()
+
+    monkeypatch.setattr(datedelta, "_STRUCT", None)
+    monkeypatch.setattr(datedelta, "_STRUCT_ERROR", None)
+    with pytest.raises(ValueError):
+        dd.from_bytes(b"")
+
+    assert not hasattr(datedelta, "struct")
+
+
+@pytest.mark.parametrize("data", [b"", b"\x00" * 11, b"\x00" * 13])
+def test_from_bytes_invalid_length(data):
+    with pytest.raises(ValueError) as exc:
+        dd.from_bytes(data)
+
+    assert "expected 12 bytes" in str(exc.value)
+
+
+@pytest.mark.parametrize("deltas", [ARRAY_DELTAS, DatedeltaArray(ARRAY_DELTAS)])
+def test_encode_many_and_decode_many(deltas):
+    data = encode_many(deltas)
+    assert data == b"".join(delta.to_bytes() for delta in ARRAY_DELTAS)
+    assert decode_many(data) == DatedeltaArray(ARRAY_DELTAS)
+    assert decode_many(memoryview(data)) == DatedeltaArray(ARRAY_DELTAS)
+
+
+def test_encode_many_and_decode_many_empty():
+    assert encode_many([]) == b""
+    assert decode_many(b"") == DatedeltaArray()
+
+
+@pytest.mark.parametrize("data", [b"\x00" * 11, b"\x00" * 16])
+def test_decode_many_invalid_length(data):
+    with pytest.raises(ValueError) as exc:
+        decode_many(data)
+
+    assert "length must be a multiple of 12" in str(exc.value)
+
+
+DATETIME_DELTAS = [
+    (dd(), dt(2020, 1, 31, 12, 30)),
+    (dd(years=1), dt(2021, 1, 31, 12, 30)),
+    (dd(months=1), dt(2020, 3, 1, 12, 30)),
+    (dd(days=1), dt(2020, 2, 1, 12, 30)),
+    (dd(years=1, months=1, days=-1), dt(2021, 2, 28, 12, 30)),
+]
+
+
+@pytest.mark.parametrize(("delta", "datetime"), DATETIME_DELTAS)
+def test_add_datedelta_to_datetime(delta, datetime):
+    tzinfo = tz(td(hours=1))
+    start = dt(2020, 1, 31, 12, 30, tzinfo=tzinfo, fold=1)
+    result = start + delta
+    assert result == datetime.replace(tzinfo=tzinfo)
+    assert result.tzinfo is tzinfo
+    assert result.fold == 1
+
+
+@pytest.mark.parametrize(("delta", "datetime"), DATETIME_DELTAS)
+def test_subtract_datedelta_from_datetime(delta, datetime):
+    tzinfo = tz(td(hours=1))
+    start = dt(2020, 1, 31, 12, 30, tzinfo=tzinfo, fold=1)
+    result = start - -delta
+    assert result == datetime.replace(tzinfo=tzinfo)
+    assert result.tzinfo is tzinfo
+    assert result.fold == 1
+
+
+def test_schedule_datetime_preserves_fold():
+    start = dt(2020, 1, 31, 12, 30, fold=1)
+    assert [result.fold for result in schedule(start, dd(days=1), 3)] == [1, 1, 1]
+
+
+def test_datedelta_array_concat():
+    assert DatedeltaArray.concat(
+        [
+            DatedeltaArray(ARRAY_DELTAS[:1]),
+            DatedeltaArray(),
+            DatedeltaArray(ARRAY_DELTAS[1:]),
+        ]
+    ) == DatedeltaArray(ARRAY_DELTAS)
+    assert DatedeltaArray.concat([]) == DatedeltaArray()
+
+
+def test_datedelta_array_take():
+    deltas = DatedeltaArray(ARRAY_DELTAS)
+    assert deltas.take(iter([3, 0, 0, -1])) == DatedeltaArray(
+        [ARRAY_DELTAS[3], ARRAY_DELTAS[0], ARRAY_DELTAS[0], ARRAY_DELTAS[-1]]
+    )
+    assert deltas.take([]) == DatedeltaArray()
+    with pytest.raises(IndexError):
+        deltas.take([4])
+
+
+def test_datedelta_array_argsort():
+    deltas = DatedeltaArray(ORDERED_DELTAS[::-1] + ORDERED_DELTAS[:3])
+    indices = deltas.argsort()
+    assert type(indices) is array.array
+    assert list(deltas.take(indices)) == sorted(deltas)
+    # The sort is stable.
+    assert indices[:2] == array.array("i", [13, 14])
+    assert DatedeltaArray().argsort() == array.array("i")
+
+
+def test_recurrence():
+    recurrence = Recurrence(d(2020, 1, 31), MONTH)
+    assert recurrence.anchor == d(2020, 1, 31)
+    assert recurrence.delta == MONTH
+    assert repr(recurrence) == (
+        "datedelta.Recurrence(datetime.date(2020, 1, 31), datedelta.datedelta(months=1))"
+    )
+
+
+@pytest.mark.parametrize("delta", PERIODS_DELTAS)
+def test_recurrence_nth(delta):
+    recurrence = Recurrence(d(2020, 1, 31), delta)
+    for n in range(30):
+        assert recurrence.nth(n) == d(2020, 1, 31) + n * delta
+
+
+def test_recurrence_nth_must_be_non_negative():
+    with pytest.raises(ValueError) as exc:
+        Recurrence(d(2020, 1, 31), MONTH).nth(-1)
+
+    assert "n must be non-negative" in str(exc.value)
+
+
+@pytest.mark.parametrize("delta", PERIODS_DELTAS)
+def test_recurrence_next_on_or_after(delta):
+    recurrence = Recurrence(d(2020, 1, 31), delta)
+    occurrences = [d(2020, 1, 31) + n * delta for n in range(1000)]
+    for date in [d(2019, 1, 1)] + BATCH_DATES + [d(2020, 3, 31), d(2021, 3, 31)]:
+        expected = min(occurrence for occurrence in occurrences if occurrence >= date)
+        assert recurrence.next_on_or_after(date) == expected
+
+
+@pytest.mark.parametrize("delta", PERIODS_DELTAS)
+def test_recurrence_between(delta):
+    recurrence = Recurrence(d(2020, 1, 31), delta)
+    occurrences = [d(2020, 1, 31) + n * delta for n in range(1000)]
+    for start, end in [
+        (d(2019, 1, 1), d(2020, 1, 31)),
+        (d(2019, 1, 1), d(2020, 7, 1)),
+        (d(2020, 1, 31), d(2021, 3, 1)),
+        (d(2020, 3, 1), d(2020, 3, 31)),
+        (d(2020, 6, 1), d(2020, 1, 1)),
+    ]:
+        assert list(recurrence.between(start, end)) == [
+            occurrence for occurrence in occurrences if start <= occurrence < end
+        ]
+
+
+def test_recurrence_end_of_calendar():
+    recurrence = Recurrence(d(9999, 1, 1), MONTH)
+    assert list(recurrence.between(d(9999, 11, 1), d.max)) == [
+        d(9999, 11, 1),
+        d(9999, 12, 1),
+    ]
+    assert list(recurrence.between(d(9999, 12, 2), d.max)) == []
+    assert recurrence.next_on_or_after(d(9999, 12, 1)) == d(9999, 12, 1)
+    assert recurrence.next_on_or_after(d(9999, 12, 2)) is None
+    assert Recurrence(d(9999, 1, 31), MONTH).next_on_or_after(d.max) == d.max
+
+
+@pytest.mark.parametrize("delta", [dd(), dd(months=-1), dd(years=1, days=-1)])
+def test_recurrence_delta_must_be_positive(delta):
+    with pytest.raises(ValueError) as exc:
+        Recurrence(d(2020, 1, 31), delta)
+
+    assert "delta must be positive" in str(exc.value)
+
+
+@pytest.mark.parametrize("delta", PERIODS_DELTAS)
+def test_next_occurrences(delta):
+    date = d(2021, 3, 31)
+    assert next_occurrences(BATCH_DATES + [d(2022, 1, 1)], delta, date) == [
+        Recurrence(anchor, delta).next_on_or_after(date)
+        for anchor in BATCH_DATES + [d(2022, 1, 1)]
+    ]
+
+
+def test_next_occurrences_end_of_calendar():
+    anchors = [d(9999, 1, 1), d(9999, 11, 30), d(9999, 12, 31)]
+    assert next_occurrences(anchors, MONTH, d(9999, 12, 15)) == [
+        None,
+        d(9999, 12, 30),
+        d(9999, 12, 31),
+    ]
+
+
+def test_next_occurrences_delta_must_be_positive():
+    with pytest.raises(ValueError) as exc:
+        next_occurrences(BATCH_DATES, dd(), d(2021, 3, 31))
+
+    assert "delta must be positive" in str(exc.value)
+
+
+CALENDAR_HOLIDAYS = [d(2024, 1, 1), d(2024, 5, 27), d(2024, 12, 25), d(2030, 1, 1)]
+
+# Ends on a Saturday.
+CALENDAR = BusinessCalendar(d(2024, 1, 1), d(2024, 12, 28), holidays=CALENDAR_HOLIDAYS)
+
+CALENDAR_DATES = [d(2024, 1, 1) + td(days=n) for n in range(363)]
+
+
+def is_business_day_loop(date):
+    return date.weekday() < 5 and date not in CALENDAR_HOLIDAYS
+
+
+def roll_forward_loop(date):
+    while not is_business_day_loop(date):
+        date += td(days=1)
+    return date
+
+
+def add_business_days_loop(date, n):
+    date = roll_forward_loop(date)
+    step = td(days=1 if n > 0 else -1)
+    for _ in range(abs(n)):
+        date += step
+        while not is_business_day_loop(date):
+            date += step
+    return date
+
+
+def test_business_calendar():
+    assert CALENDAR.start == d(2024, 1, 1)
+    assert CALENDAR.end == d(2024, 12, 28)
+
+
+def test_business_calendar_end_must_not_be_before_start():
+    with pytest.raises(ValueError) as exc:
+        BusinessCalendar(d(2024, 1, 2), d(2024, 1, 1))
+
+    assert "end must not be before start" in str(exc.value)
+
+
+def test_business_calendar_weekend():
+    calendar = BusinessCalendar(d(2024, 1, 1), d(2024, 1, 31), weekend=[4, 5])
+    assert not calendar.is_business_day(d(2024, 1, 5))
+    assert not calendar.is_business_day(d(2024, 1, 6))
+    assert calendar.is_business_day(d(2024, 1, 7))
+
+
+def test_is_business_day():
+    for date in CALENDAR_DATES:
+        assert CALENDAR.is_business_day(date) == is_business_day_loop(date)
+
+
+def test_roll_forward():
+    for date in CALENDAR_DATES[:-1]:
+        result = CALENDAR.roll_forward(date)
+        assert result == roll_forward_loop(date)
+        if result == date:
+            assert result is date
+
+
+@pytest.mark.parametrize("n", [-10, -1, 0, 1, 5, 20])
+def test_add_business_days(n):
+    for date in CALENDAR_DATES[20:-40]:
+        assert CALENDAR.add_business_days(date, n) == add_business_days_loop(date, n)
+
+
+def test_business_days_between():
+    for start in CALENDAR_DATES[::7]:
+        for end in CALENDAR_DATES[::5]:
+            count = CALENDAR.business_days_between(start, end)
+            if start <= end:
+                assert count == sum(
+                    is_business_day_loop(start + td(days=n))
+                    for n in range((end - start).days)
+                )
+            else:
+                assert count == -CALENDAR.business_days_between(end, start)
+
+
+@pytest.mark.parametrize("delta", BATCH_DELTAS[:9])
+def test_business_calendar_add(delta):
+    for date in CALENDAR_DATES[::3]:
+        result = date + delta
+        if d(2024, 1, 1) <= result <= d(2024, 12, 27):
+            assert CALENDAR.add(date, delta) == roll_forward_loop(result)
+
+
+def test_business_calendar_datetime():
+    datetime = dt(2024, 1, 31, 12, 30)
+    assert CALENDAR.add(datetime, dd(months=1, days=1)) == dt(2024, 3, 4, 12, 30)
+    assert CALENDAR.add_business_days(datetime, 3) == dt(2024, 2, 5, 12, 30)
+
+
+@pytest.mark.parametrize("n", [-1, 0, 1, 5])
+def test_add_business_days_array(n):
+    dates = CALENDAR_DATES[20:-20]
+    ordinals = [date.toordinal() for date in dates]
+    result = CALENDAR.add_business_days_array(ordinals, n)
+    assert type(result) is array.array
+    assert list(result) == [
+        CALENDAR.add_business_days(date, n).toordinal() for date in dates
+    ]
+    if n == 0:
+        assert CALENDAR.roll_forward_array(ordinals) == result
+
+
+def test_business_calendar_add_array():
+    dates = CALENDAR_DATES[:300]
+    ordinals = [date.toordinal() for date in dates]
+    assert list(CALENDAR.add_array(ordinals, MONTH)) == [
+        CALENDAR.add(date, MONTH).toordinal() for date in dates
+    ]
+
+
+@pytest.mark.parametrize(
+    "operation",
+    [
+        lambda calendar, date: calendar.is_business_day(date),
+        lambda calendar, date: calendar.roll_forward(date),
+        lambda calendar, date: calendar.add_business_days(date, 1),
+        lambda calendar, date: calendar.add(date, dd()),
+        lambda calendar, date: calendar.roll_forward_array([date.toordinal()]),
+        lambda calendar, date: calendar.add_array([date.toordinal()], dd()),
+    ],
+)
+@pytest.mark.parametrize("date", [d(2023, 12, 31), d(2024, 12, 29)])
+def test_business_calendar_date_out_of_range(operation, date):
+    with pytest.raises(ValueError) as exc:
+        operation(CALENDAR, date)
+
+    assert "date is outside of the calendar's range" in str(exc.value)
+
+
+def test_business_days_between_calendar_end():
+    # The calendar ends on 2024-12-28. The day after can be an exclusive bound.
+    count = CALENDAR.business_days_between(d(2024, 12, 1), d(2024, 12, 29))
+    assert count == sum(
+        is_business_day_loop(d(2024, 12, 1) + td(days=n)) for n in range(28)
+    )
+    assert CALENDAR.business_days_between(d(2024, 12, 29), d(2024, 12, 1)) == -count
+
+
+@pytest.mark.parametrize(
+    ("start", "end"),
+    [
+        (d(2023, 12, 31), d(2024, 6, 1)),
+        (d(2024, 6, 1), d(2023, 12, 31)),
+        (d(2024, 6, 1), d(2024, 12, 30)),
+        (d(2024, 12, 30), d(2024, 6, 1)),
+        (d(2024, 12, 29), d(2024, 12, 29)),
+    ],
+)
+def test_business_days_between_out_of_range(start, end):
+    with pytest.raises(ValueError) as exc:
+        CALENDAR.business_days_between(start, end)
+
+    assert "date is outside of the calendar's range" in str(exc.value)
+
+
+@pytest.mark.parametrize(
+    "operation",
+    [
+        lambda calendar: calendar.roll_forward(d(2024, 12, 28)),
+        lambda calendar: calendar.add_business_days(d(2024, 12, 27), 1),
+        lambda calendar: calendar.add_business_days(d(2024, 1, 2), -1),
+        lambda calendar: calendar.add(d(2024, 11, 28), MONTH),
+        lambda calendar: calendar.roll_forward_array([d(2024, 12, 28).toordinal()]),
+        lambda calendar: calendar.add_business_days_array(
+            [d(2024, 1, 2).toordinal()], -1
+        ),
+    ],
+)
+def test_business_calendar_result_out_of_range(operation):
+    with pytest.raises(ValueError) as exc:
+        operation(CALENDAR)
+
+    assert "result is outside of the calendar's range" in str(exc.value)
+
+
+@pytest.mark.parametrize("typecode", ["i", "l", "q"])
+@pytest.mark.parametrize("workers", [None, 1, 2, 3])
+def test_add_and_sub_array_workers(workers, typecode):
+    delta = dd(years=1, months=1, days=1)
+    ordinals = array.array(typecode, [date.toordinal() for date in BATCH_DATES])
+    assert add_array(ordinals, delta, workers=workers) == add_array(ordinals, delta)
+    assert sub_array(ordinals, delta, workers=workers) == sub_array(ordinals, delta)
+
+
+@pytest.mark.parametrize("workers", [None, 1, 2, 3])
+def test_add_and_sub_datedelta_array_workers(workers):
+    deltas = DatedeltaArray(BATCH_DELTAS[: len(BATCH_DATES)])
+    ordinals = [date.toordinal() for date in BATCH_DATES]
+    assert add_array(ordinals, deltas, workers=workers) == add_array(ordinals, deltas)
+    assert sub_array(ordinals, deltas, workers=workers) == sub_array(ordinals, deltas)
+
+
+@pytest.mark.parametrize("delta", [DAY, DatedeltaArray()])
+def test_add_array_workers_empty(delta):
+    assert add_array([], delta, workers=2) == array.array("i")
+
+
+def test_add_array_workers_must_have_same_length():
+    with pytest.raises(ValueError) as exc:
+        add_array([1, 2], DatedeltaArray([DAY]), workers=2)
+
+    assert "ordinals and deltas must have the same length" in str(exc.value)
+
+
+STREAM_ROWS = [
+    ["id", "start_date"],
+    ["1", "2024-01-31"],
+    ["2", ""],
+    ["3", "2024-01-31"],
+    ["4", "2023-02-28"],
+]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 1024])
+def test_stream_shift(chunk_size):
+    assert list(
+        stream_shift(STREAM_ROWS, "start_date", MONTH, chunk_size=chunk_size)
+    ) == [
+        ["id", "start_date"],
+        ["1", "2024-03-01"],
+        ["2", ""],
+        ["3", "2024-03-01"],
+        ["4", "2023-03-28"],
+    ]
+
+
+def test_stream_shift_subtract():
+    assert list(stream_shift(STREAM_ROWS[1:], 1, MONTH, subtract=True)) == [
+        ["1", "2023-12-31"],
+        ["2", ""],
+        ["3", "2023-12-31"],
+        ["4", "2023-01-28"],
+    ]
+
+
+def test_stream_shift_does_not_modify_rows():
+    rows = [tuple(row) for row in STREAM_ROWS]
+    list(stream_shift(rows, "start_date", MONTH))
+    assert rows == [tuple(row) for row in STREAM_ROWS]
+
+
+def test_stream_shift_clears_cache(monkeypatch):
+    monkeypatch.setattr(datedelta, "_STREAM_CACHE_SIZE", 0)
+    rows = stream_shift(STREAM_ROWS, "start_date", MONTH, chunk_size=1)
+    assert list(rows) == list(stream_shift(STREAM_ROWS, "start_date", MONTH))
+
+
+@pytest.mark.parametrize("rows", [[], [["id", "start_date"]]])
+def test_stream_shift_no_rows(rows):
+    assert list(stream_shift(rows, "start_date", MONTH)) == rows
+
+
+def test_stream_shift_column_not_found():
+    with pytest.raises(ValueError) as exc:
+        list(stream_shift(STREAM_ROWS, "end_date", MONTH))
+
+    assert "column 'end_date' not found in header" in str(exc.value)
+
+
+@pytest.mark.parametrize(
+    ("rows", "column", "message"),
+    [
+        (
+            [["id", "start_date"], ["1", "2024-01-31"], ["2", "2024-02-29"], ["3"]],
+            "start_date",
+            "row 4 has no column 'start_date'",
+        ),
+        ([["1", "2024-01-31"], ["2", "2024-02-29"], ["3"]], 1, "row 3 has no column 1"),
+        (
+            [["2024-01-31", "1"], ["2024-02-29", "2"], ["3"]],
+            -2,
+            "row 3 has no column -2",
+        ),
+    ],
+)
+@pytest.mark.parametrize("chunk_size", [1, 2, 1024])
+def test_stream_shift_short_row(rows, column, message, chunk_size):
+    with pytest.raises(ValueError) as exc:
+        list(stream_shift(rows, column, YEAR, chunk_size=chunk_size))
+
+    assert str(exc.value) == message
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 1024])
+def test_stream_shift_invalid_date(chunk_size):
+    rows = [["id", "start_date"], ["1", "2024-01-31"], ["2", ""], ["3", "garbage"]]
+    with pytest.raises(ValueError) as exc:
+        list(stream_shift(rows, "start_date", YEAR, chunk_size=chunk_size))
+
+    assert str(exc.value) == "row 4: Invalid isoformat string: 'garbage'"
+
+
+STREAM_CSV = "id,start_date\r\n1,2024-01-31\r\n2,\r\n"
+
+
+def test_main_shift_files(tmp_path, capsys):
+    (tmp_path / "input.csv").write_bytes(STREAM_CSV.encode())
+    datedelta._main(
+        [
+            "shift",
+            "start_date",
+            "P1M",
+            str(tmp_path / "input.csv"),
+            str(tmp_path / "output.csv"),
+        ]
+    )
+    output = (tmp_path / "output.csv").read_bytes().decode()
+    assert output == "id,start_date\r\n1,2024-03-01\r\n2,\r\n"
+    assert "2 rows in" in capsys.readouterr().err
+
+
+def test_main_shift_stdin_stdout(monkeypatch, capsys):
+    monkeypatch.setattr("sys.stdin", io.StringIO(STREAM_CSV))
+    datedelta._main(["shift", "--subtract", "start_date", "P1M"])
+    captured = capsys.readouterr()
+    assert captured.out == "id,start_date\r\n1,2023-12-31\r\n2,\r\n"
+    assert "rows/sec" in captured.err
+
+
+def test_main_shift_error(tmp_path, capsys):
+    (tmp_path / "input.csv").write_text("id,start_date\r\n1,2024-02-31\r\n")
+    with pytest.raises(SystemExit) as exc:
+        datedelta._main(["shift", "start_date", "P1M", str(tmp_path / "input.csv")])
+
+    assert exc.value.code == 1
+    assert "error: row 2: day is out of range for month" in capsys.readouterr().err
+
+
+def test_main_shift_overflow(tmp_path, capsys):
+    (tmp_path / "input.csv").write_text("id,start_date\r\n1,9999-12-31\r\n")
+    with pytest.raises(SystemExit) as exc:
+        datedelta._main(["shift", "start_date", "P1D", str(tmp_path / "input.csv")])
+
+    assert exc.value.code == 1
+    assert "error: date value out of range" in capsys.readouterr().err
+
+
+def test_main_shift_short_row(tmp_path, capsys):
+    (tmp_path / "input.csv").write_text("id,start_date\r\n1\r\n")
+    with pytest.raises(SystemExit) as exc:
+        datedelta._main(["shift", "start_date", "P1M", str(tmp_path / "input.csv")])
+
+    assert exc.value.code == 1
+    assert "error: row 2 has no column 'start_date'" in capsys.readouterr().err
+
+
+def test_main_shift_input_not_found(tmp_path, capsys):
+    with pytest.raises(SystemExit) as exc:
+        datedelta._main(["shift", "start_date", "P1M", str(tmp_path / "input.csv")])
+
+    assert exc.value.code == 1
+    assert "error: [Errno 2] No such file or directory" in capsys.readouterr().err
+
+
+def test_main_shift_output_error(tmp_path, monkeypatch, capsys):
+    (tmp_path / "input.csv").write_bytes(STREAM_CSV.encode())
+    files = []
+
+    def open_and_record(*args, **kwargs):
+        file = io.open(*args, **kwargs)
+        files.append(file)
+        return file
+
+    monkeypatch.setattr("builtins.open", open_and_record)
+    with pytest.raises(SystemExit) as exc:
+        datedelta._main(
+            [
+                "shift",
+                "start_date",
+                "P1M",
+                str(tmp_path / "input.csv"),
+                str(tmp_path / "missing" / "output.csv"),
+            ]
+        )
+
+    assert exc.value.code == 1
+    assert "error: [Errno 2] No such file or directory" in capsys.readouterr().err
+    # The input file is closed even though opening the output file failed.
+    (input_file,) = files
+    assert input_file.closed
+
+
+IMPORT_SCRIPT = """
+import datetime
+import sys
+import time
+import tracemalloc
+
+modules = set(sys.modules)
+tracemalloc.start()
+start = time.perf_counter()
+import datedelta
+elapsed = time.perf_counter() - start
+print(sorted(set(sys.modules) - modules - {"datedelta"}))
+print(elapsed)
+print(tracemalloc.get_traced_memory()[1])
+"""
+
+
+def test_import_footprint(tmp_path):
+    # Importing datedelta must stay fast: it's used in short-lived processes.
+    # Check with: python -X importtime -c "import datedelta"
+    env = dict(os.environ, PYTHONPYCACHEPREFIX=str(tmp_path))
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    # The first run compiles the module. The second run measures the import.
+    for _ in range(2):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_SCRIPT],
+            capture_output=True,
+            check=True,
+            env=env,
+            text=True,
+        ).stdout
+    modules, elapsed, memory = output.splitlines()
+    assert modules == "[]"
+    assert float(elapsed) < 0.02
+    assert int(memory) < 500_000
+
+
+@pytest.mark.parametrize(
+    ("name", "use"),
+    [
+        ("_intern", lambda: intern_cache_info()),
+        ("_intern", lambda: dd.intern(years=1)),
+        ("_shift_cached", lambda: shift_cache_info()),
+        ("_shift_cached", lambda: cached_add(d(2020, 1, 1), MONTH)),
+        ("_STRUCT", lambda: dd.from_bytes(MONTH.to_bytes())),
+        ("_MONTH_ORDINALS", lambda: add_array([1], MONTH)),
+    ],
+)
+def test_lazy_loading(monkeypatch, name, use):
+    monkeypatch.setattr(datedelta, name, None)
+    use()
+    assert getattr(datedelta, name) is not None
+
+
+def test_lazy_loading_in_threads(monkeypatch):
+    monkeypatch.setattr(datedelta, "_intern", None)
+    monkeypatch.setattr(datedelta, "_caches", {})
+    barrier = threading.Barrier(4)
+
+    def load():
+        barrier.wait()
+        return datedelta._load_intern()
+
+    with concurrent.futures.ThreadPoolExecutor(4) as executor:
+        caches = list(executor.map(lambda _: load(), range(4)))
+    assert all(cache is caches[0] for cache in caches)
+
+
+@pytest.mark.parametrize(
+    ("name", "load", "set_cache_size", "maxsize"),
+    [
+        ("intern", "_load_intern", set_intern_cache_size, 1024),
+        ("shift", "_load_shift_cached", set_shift_cache_size, 4096),
+    ],
+)
+def test_set_cache_size_replaces_shared_cache(name, load, set_cache_size, maxsize):
+    set_cache_size(10)
+    try:
+        # Threads that load the cache afterwards get the new cache.
+        cache = getattr(datedelta, load)()
+        assert datedelta._caches[name] is cache
+        assert cache.cache_info().maxsize == 10
+    finally:
+        set_cache_size(maxsize)
+
+
+def run_operations():
+    ordinals = [date.toordinal() for date in BATCH_DATES]
+    deltas = DatedeltaArray(BATCH_DELTAS)
+    return [
+        [date + delta for date in BATCH_DATES for delta in BATCH_DELTAS],
+        [date - delta for date in BATCH_DATES for delta in BATCH_DELTAS],
+        [hash(delta) for delta in BATCH_DELTAS],
+        [delta.apply_many(BATCH_DATES) for delta in BATCH_DELTAS],
+        [add_array(ordinals, delta) for delta in BATCH_DELTAS],
+        [sub_array(ordinals, delta) for delta in BATCH_DELTAS],
+        grid(ordinals, deltas),
+        [cached_add(date, delta) for date in BATCH_DATES for delta in BATCH_DELTAS],
+        [dd.intern(years=n % 3, months=n % 5) for n in range(100)],
+        [CALENDAR.add(date, MONTH) for date in CALENDAR_DATES[:300]],
+    ]
+
+
+def test_threads():
+    # Results must be the same in multiple threads, including on free-threaded
+    # builds of Python, where threads run in parallel.
+    expected = run_operations()
+    barrier = threading.Barrier(8)
+
+    def run():
+        barrier.wait()
+        return [run_operations() for _ in range(5)]
+
+    with concurrent.futures.ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(lambda _: run(), range(8)))
+    assert all(result == expected for result in itertools.chain(*results))
+
+
+@pytest.fixture
+def instrumented():
+    instrumentation.enable()
+    yield
+    instrumentation.disable()
+
+
+def counts(snapshot):
+    # Drop timings, which aren't deterministic.
+    return {
+        operation: {
+            shape: (values["count"], values["roll_forwards"])
+            for shape, values in shapes.items()
+        }
+        for operation, shapes in snapshot["operations"].items()
+    }
+
+
+def test_instrumentation_disabled():
+    methods = dict(vars(dd))
+    assert not instrumentation.enabled
+    instrumentation.enable()
+    assert instrumentation.enabled
+    assert vars(dd)["__radd__"] is not methods["__radd__"]
+    instrumentation.disable()
+    assert not instrumentation.enabled
+    # When instrumentation is disabled, methods aren't wrapped at all.
+    assert vars(dd) == methods
+    instrumentation.disable()
+    assert vars(dd) == methods
+
+
+def test_instrumentation(instrumented):
+    delta = dd(months=1)
+    d(2024, 1, 31) + delta
+    d(2024, 3, 31) - delta
+    d(2024, 2, 29) + YEAR
+    dt(2024, 2, 29) - YEAR
+    delta + DAY
+    delta - DAY
+    -delta
+    2 * delta
+    delta * 2
+    DatedeltaSubclass.intern(years=1, days=1)
+    delta.apply_many(iter([d(2024, 1, 30), d(2024, 2, 29), dt(2024, 1, 31)]))
+    delta.apply_many([d(2024, 3, 31)], subtract=True)
+    assert counts(instrumentation.snapshot()) == {
+        "construct": {"months": (4, 0), "months+days": (2, 0), "years+days": (1, 0)},
+        "add_date": {"months": (2, 2), "years": (1, 1)},
+        "sub_date": {"months": (1, 1), "years": (1, 1)},
+        "add": {"months": (1, 0)},
+        "sub": {"months": (1, 0)},
+        "neg": {"months": (1, 0)},
+        "mul": {"months": (2, 0)},
+        "intern": {"years+days": (1, 0)},
+        "apply_many": {"months": (2, 2)},
+    }
+
+
+def test_instrumentation_constructions(instrumented):
+    dd.from_bytes(MONTH.to_bytes())
+    DatedeltaArray([YEAR])[0]
+    -DatedeltaSubclass(days=1)
+    assert counts(instrumentation.snapshot())["construct"] == {
+        "months": (1, 0),
+        "years": (1, 0),
+        "days": (2, 0),
+    }
+
+
+def test_instrumentation_preserves_results(instrumented):
+    assert run_operations()[:4] == [
+        [date + delta for date in BATCH_DATES for delta in BATCH_DELTAS],
+        [date - delta for date in BATCH_DATES for delta in BATCH_DELTAS],
+        [hash(delta) for delta in BATCH_DELTAS],
+        [delta.apply_many(BATCH_DATES) for delta in BATCH_DELTAS],
+    ]
+    assert type(DatedeltaSubclass.intern(days=2)) is DatedeltaSubclass
+    assert dd.__radd__.__name__ == "__radd__"
+
+
+def test_instrumentation_not_implemented(instrumented):
+    with pytest.raises(TypeError):
+        DAY + 1
+    with pytest.raises(TypeError):
+        1 - DAY
+    assert instrumentation.snapshot()["operations"] == {}
+
+
+@pytest.mark.parametrize("delta", BATCH_DELTAS)
+def test_instrumentation_roll_forwards(instrumented, delta):
+    # A roll-forward adjustment happens when the day changes before adding days.
+    months = dd(years=delta.years, months=delta.months)
+    for date in BATCH_DATES:
+        instrumentation.reset()
+        date + delta
+        date - delta
+        operations = instrumentation.snapshot()["operations"]
+        (added,) = operations["add_date"].values()
+        (subtracted,) = operations["sub_date"].values()
+        assert added["roll_forwards"] == int((date + months).day != date.day)
+        assert subtracted["roll_forwards"] == int((date - months).day != date.day)
+
+
+def test_instrumentation_timing(instrumented):
+    DAY.apply_many([d(2024, 1, 1)] * 1000)
+    (values,) = instrumentation.snapshot()["operations"]["apply_many"].values()
+    assert values["seconds"] > 0
+
+
+def test_instrumentation_callback():
+    events = []
+    instrumentation.enable(callback=lambda *event: events.append(event))
+    try:
+        d(2024, 1, 31) + MONTH
+        instrumentation.enable()
+        d(2024, 1, 31) + MONTH
+    finally:
+        instrumentation.disable()
+    ((operation, shape, seconds, roll_forwards),) = events
+    assert (operation, shape, roll_forwards) == ("add_date", "months", 1)
+    assert seconds > 0
+
+
+def test_instrumentation_reset(instrumented):
+    d(2024, 1, 1) + MONTH
+    instrumentation.reset()
+    assert instrumentation.snapshot()["operations"] == {}
+
+
+def test_instrumentation_cache_hits(shift_cache, instrumented):
+    dd.intern(years=3)
+    dd.intern(years=3)
+    cached_add(d(2024, 1, 1), MONTH)
+    cached_add(d(2024, 1, 1), MONTH)
+    cached_sub(d(2024, 2, 1), MONTH)
+    assert instrumentation.snapshot()["cache_hits"] == {"intern": 1, "shift": 1}
+    # Hits are counted from zero when the cache is replaced.
+    set_shift_cache_size(2)
+    cached_add(d(2024, 1, 1), MONTH)
+    cached_add(d(2024, 1, 1), MONTH)
+    assert instrumentation.snapshot()["cache_hits"] == {"intern": 1, "shift": 1}
+
+
+def test_instrumentation_before_caches_are_loaded(monkeypatch):
+    monkeypatch.setattr(datedelta, "_intern", None)
+    monkeypatch.setattr(datedelta, "_shift_cached", None)
+    fresh = datedelta._Instrumentation()
+    assert fresh.snapshot() == {
+        "operations": {},
+        "cache_hits": {"intern": 0, "shift": 0},
+    }
+
+
+def test_instrumentation_in_threads(instrumented):
+    barrier = threading.Barrier(8)
+
+    def run():
+        barrier.wait()
+        return [date + MONTH for date in BATCH_DATES]
+
+    with concurrent.futures.ThreadPoolExecutor(8) as executor:
+        list(executor.map(lambda _: run(), range(8)))
+    (values,) = instrumentation.snapshot()["operations"]["add_date"].values()
+    assert values["count"] == 8 * len(BATCH_DATES)
+    assert values["roll_forwards"] == 8 * 2
+
+
+def test_instrumentation_enable_and_disable_in_threads():
+    methods = dict(vars(dd))
+    barrier = threading.Barrier(4)
+
+    def enable_and_disable():
+        for _ in range(50):
+            barrier.wait()
+            instrumentation.enable()
+            barrier.wait()
+            instrumentation.disable()
+
+    with concurrent.futures.ThreadPoolExecutor(4) as executor:
+        for future in [executor.submit(enable_and_disable) for _ in range(4)]:
+            future.result()
+    assert vars(dd) == methods